@@ -1,8 +1,15 @@
+import logging
+
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
 
+from app.extensions.cache import payload_cache
+from app.extensions.compression import compressor
 from app.extensions.db import db
+from app.extensions import json_provider, jwt
+from app.extensions.rate_limit import rate_limiter
+from app.extensions.request_metrics import request_metrics
 
 
 def create_app():
@@ -13,19 +20,45 @@ def create_app():
 
     app.config.from_object(Config)
 
+    # Cấu hình root logger trước khi dùng app.logger để log của app và các module ra cùng 1 chỗ
+    logging.basicConfig(level=app.config["LOG_LEVEL"], format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # Đăng ký trước compressor: after_request chạy ngược thứ tự nên thời gian đo gồm cả bước nén
+    request_metrics.init_app(app)
+    json_provider.init_app(app)
     db.init_app(app)
+    payload_cache.init_app(app)
+    compressor.init_app(app)
+    jwt.init_app(app)
+    rate_limiter.init_app(app)
+
+    from app.services.pdf_job_service import pdf_job_manager
+    from app.services.pdf_parse_cache import pdf_parse_cache
+    from app.services.password_hasher import password_hasher
+
+    pdf_job_manager.init_app(app)
+    pdf_parse_cache.init_app(app)
+    password_hasher.init_app(app)
 
     # --- Import models để Migrate nhận diện ---
     from app.models.user_model import User  # noqa: F401
     from app.models.exam_model import Exam, Question, Option  # noqa: F401
     from app.models.attempt_model import ExamAttempt, Answer  # noqa: F401
+    from app.models.stats_model import ExamStats, ExamScoreBucket, QuestionStats  # noqa: F401
 
     Migrate(app, db)
     CORS(app, resources={r"/*": {"origins": ["https://client-webkiemtra.vercel.app"]}}, supports_credentials=True)    # --- Đăng ký các blueprint (controller) ---
     from app.controllers.exam_controller import exam_bp
     from app.controllers.auth_controller import auth_bp
+    from app.controllers.metrics_controller import metrics_bp
 
     app.register_blueprint(exam_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(metrics_bp)
+
+    # --- CLI: flask check-indexes, ... ---
+    from app import cli
+
+    cli.init_app(app)
 
     return app
\ No newline at end of file
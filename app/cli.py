@@ -0,0 +1,162 @@
+import re
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import click
+from sqlalchemy import event, text
+
+from app.extensions.db import db
+from app.models.attempt_model import Answer, ExamAttempt
+from app.models.exam_model import Exam, Option, Question
+from app.models.user_model import User
+from app.repositories.exam_repository import ExamRepository
+from app.repositories.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_paginate
+from app.repositories.stats_repository import ExamStatsRepository
+
+
+def _seed_sample():
+    """
+    1 bộ dữ liệu mẫu (user, đề, câu hỏi, đáp án, bài làm, câu trả lời) để các truy vấn nạp
+    quan hệ (selectinload, ...) đều thực sự chạy. Gọi trong transaction sẽ bị rollback.
+    """
+    user = User(username=f"check-indexes-{uuid.uuid4().hex}", password="x", role="teacher")
+    db.session.add(user)
+    db.session.flush()
+    exam = Exam(title="check-indexes", duration=1, created_by=user.id)
+    db.session.add(exam)
+    db.session.flush()
+    question = Question(exam_id=exam.id, content="check-indexes", question_type="mcq", score=1.0)
+    db.session.add(question)
+    db.session.flush()
+    option = Option(question_id=question.id, content="check-indexes", is_correct=True)
+    attempt = ExamAttempt(exam_id=exam.id, user_id=user.id, end_time=datetime.utcnow(), total_score=1.0)
+    db.session.add_all([option, attempt])
+    db.session.flush()
+    db.session.add(Answer(attempt_id=attempt.id, question_id=question.id, selected_option_id=option.id, score=1.0))
+    db.session.flush()
+    return SimpleNamespace(
+        user_id=user.id, exam_id=exam.id, question_id=question.id, option_id=option.id, attempt_id=attempt.id
+    )
+
+
+def _hot_queries(sample):
+    """
+    Các truy vấn nóng, gọi đúng hàm repository / phân trang mà controller dùng (không chép lại
+    câu SQL) nên không bị lệch khi code đổi. Mỗi danh sách kiểm tra cả trang đầu và trang
+    sau (điều kiện cursor `sort < x OR (sort = x AND id < y)`).
+    """
+    repo = ExamRepository()
+    # Cursor "sau" mọi dòng mẫu để trang sau vẫn trả về dữ liệu (chạy cả các query nạp quan hệ)
+    cursor = encode_cursor(datetime.utcnow() + timedelta(days=1), 0)
+
+    def pages(query_fn, sort_column, id_column):
+        return [
+            lambda: keyset_paginate(query_fn(), sort_column, id_column, DEFAULT_PAGE_SIZE),
+            lambda: keyset_paginate(query_fn(), sort_column, id_column, DEFAULT_PAGE_SIZE, cursor),
+        ]
+
+    lists = {
+        "list_exams": pages(repo.exams_query, Exam.created_at, Exam.id),
+        "my_created_exams": pages(lambda: repo.exams_query(created_by=sample.user_id), Exam.created_at, Exam.id),
+        "my_attempts": pages(
+            lambda: repo.user_attempts_query(sample.user_id), ExamAttempt.start_time, ExamAttempt.id
+        ),
+        "exam_attempts": pages(
+            lambda: repo.exam_attempts_query(sample.exam_id), ExamAttempt.start_time, ExamAttempt.id
+        ),
+    }
+    queries = {}
+    for name, (first_page, cursor_page) in lists.items():
+        queries[name] = first_page
+        queries[f"{name}:cursor"] = cursor_page
+
+    queries.update(
+        {
+            "exam_version": lambda: repo.get_exam_version(sample.exam_id),
+            "exam_attempts_version": lambda: repo.exam_attempts_version(sample.exam_id),
+            "user_attempts_version": lambda: repo.user_attempts_version(sample.user_id),
+            "exam_tree": lambda: repo.get_exam_tree(sample.exam_id),
+            "attempt_with_exam_tree": lambda: repo.get_attempt_with_exam_tree(sample.attempt_id),
+            "start_attempt": lambda: repo.start_or_resume_attempt(sample.exam_id, sample.user_id),
+            "answer_key": lambda: repo.load_answer_key_rows(sample.exam_id),
+            "response_rows": lambda: repo.load_response_rows(sample.exam_id),
+            "attempt_answer_choices": lambda: repo.get_attempt_answer_choices(sample.attempt_id),
+            "attempt_answer": lambda: repo.get_answer(sample.attempt_id, sample.question_id),
+            "regrade_question": lambda: repo.regrade_question(
+                sample.exam_id, sample.question_id, sample.option_id, 1.0
+            ),
+        }
+    )
+    return queries
+
+
+def _capture(connection, fn):
+    """Chạy fn(), trả về các câu SQL (statement, parameters) nó gửi xuống `connection`."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+        # Các object mẫu đã nạp không được dùng lại ở truy vấn sau (phải query lại từ DB)
+        db.session.expire_all()
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def _explain(connection, statement, parameters):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        lines = [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)]
+        full_scans = [line.strip() for line in lines if "Seq Scan" in line]
+    elif dialect == "sqlite":
+        lines = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        full_scans = [line for line in lines if re.match(r"^SCAN \w+$", line.strip())]
+    else:
+        raise click.ClickException(f"EXPLAIN chưa hỗ trợ dialect: {dialect}")
+    return lines, full_scans
+
+
+def init_app(app) -> None:
+    @app.cli.command("check-indexes")
+    @click.option("--verbose", "-v", is_flag=True, help="In toàn bộ query plan")
+    def check_indexes(verbose):
+        """EXPLAIN các truy vấn nóng, báo lỗi nếu có truy vấn phải quét toàn bảng."""
+        failed = []
+        connection = db.session.connection()
+        try:
+            if connection.dialect.name == "postgresql":
+                # Bảng ít dữ liệu thì planner luôn chọn Seq Scan -> tắt đi để kiểm tra index có dùng được không
+                connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+            sample = _seed_sample()
+            for name, fn in _hot_queries(sample).items():
+                statements = _capture(connection, fn)
+                for i, (statement, parameters) in enumerate(statements, 1):
+                    label = name if len(statements) == 1 else f"{name}[{i}]"
+                    lines, full_scans = _explain(connection, statement, parameters)
+                    status = "FAIL" if full_scans else "ok"
+                    click.echo(f"{status:<4} {label}")
+                    if verbose or full_scans:
+                        for line in lines:
+                            click.echo(f"       {line}")
+                    if full_scans:
+                        failed.append(label)
+        finally:
+            # Không giữ lại dữ liệu mẫu / thay đổi của các truy vấn ghi
+            db.session.rollback()
+
+        if failed:
+            raise click.ClickException(f"Truy vấn quét toàn bảng: {', '.join(failed)}")
+
+    @app.cli.command("rebuild-exam-stats")
+    @click.option("--exam-id", type=int, default=None, help="Chỉ tính lại 1 đề (mặc định: tất cả)")
+    def rebuild_exam_stats(exam_id):
+        """Tính lại bảng thống kê từ attempts/answers (sửa lệch số liệu cộng dồn)."""
+        ExamStatsRepository().rebuild(exam_id)
+        db.session.commit()
+        click.echo(f"Đã tính lại thống kê cho {'đề ' + str(exam_id) if exam_id is not None else 'tất cả đề'}")
@@ -1,12 +1,76 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
+from app.extensions.db_pool import build_engine_options
+
 load_dotenv()
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pool connection DB (DB_POOL_MODE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    # DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS), xem build_engine_options
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI, os.environ)
+
+    # Secret ký JWT (HS256), đọc 1 lần lúc khởi động
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+
+    # Băm mật khẩu (định dạng method của werkzeug), hash cũ khác policy được băm lại khi đăng nhập
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")  # VD: scrypt:16384:8:1, pbkdf2:sha256:600000
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or None  # Mặc định = số CPU
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+    # Log + đo hiệu năng request: request chậm hơn SLOW_REQUEST_MS ghi log JSON (logger webkiemtra.slow_request)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+    # JSON response: "auto" = orjson nếu đã cài, "std" = json của stdlib
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Rate limit (token bucket) cho đăng nhập / đăng ký, dạng "<số lượt>/<second|minute|hour>".
+    # Cả trường có thể dùng chung 1 IP (NAT) nên giới hạn theo IP để rộng, chặn chính theo username.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_BACKEND_URL = os.getenv("RATE_LIMIT_BACKEND_URL")  # VD: redis://localhost:6379/1 hoặc memory://
+    RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+    RATE_LIMITS = {
+        "login_ip": os.getenv("RATE_LIMIT_LOGIN_IP", "300/minute"),
+        "login_username": os.getenv("RATE_LIMIT_LOGIN_USERNAME", "10/minute"),
+        "register_ip": os.getenv("RATE_LIMIT_REGISTER_IP", "30/minute"),
+    }
+
+    # Read replica (tùy chọn): các view @read_only đọc từ đây, ghi vẫn vào primary
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": DATABASE_REPLICA_URL, **build_engine_options(DATABASE_REPLICA_URL, os.environ)}}
+        if DATABASE_REPLICA_URL
+        else {}
+    )
+
+    # Cache payload JSON (LRU trong process, có thể dùng chung qua Redis)
+    PAYLOAD_CACHE_SIZE = int(os.getenv("PAYLOAD_CACHE_SIZE", "256"))
+    PAYLOAD_CACHE_SHARED_TTL = int(os.getenv("PAYLOAD_CACHE_SHARED_TTL", "3600"))
+    CACHE_BACKEND_URL = os.getenv("CACHE_BACKEND_URL")  # VD: redis://localhost:6379/0 hoặc memory://
+
+    # Nén response (gzip, thêm brotli nếu đã cài package `brotli`), body nhỏ hơn ngưỡng thì gửi nguyên
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() in ("1", "true", "yes")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # byte
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+    # Job parse PDF chạy nền (ProcessPoolExecutor)
+    PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+    PDF_JOB_TIME_LIMIT = int(os.getenv("PDF_JOB_TIME_LIMIT", "60"))  # giây / job
+    PDF_JOB_MEMORY_LIMIT_MB = int(os.getenv("PDF_JOB_MEMORY_LIMIT_MB", "1024"))  # giới hạn RLIMIT_AS của process con
+    PDF_JOB_MAX_PENDING = int(os.getenv("PDF_JOB_MAX_PENDING", "20"))
+    PDF_JOB_RESULT_TTL = int(os.getenv("PDF_JOB_RESULT_TTL", "3600"))
+    PDF_JOB_DIR = os.getenv("PDF_JOB_DIR", os.path.join(tempfile.gettempdir(), "webkiemtra_pdf_jobs"))
+
+    # Cache kết quả parse PDF trên đĩa (theo SHA-256 nội dung file), 0 = tắt
+    PDF_PARSE_CACHE_DIR = os.getenv("PDF_PARSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "webkiemtra_pdf_cache"))
+    PDF_PARSE_CACHE_MAX_MB = int(os.getenv("PDF_PARSE_CACHE_MAX_MB", "256"))
+
     # kiểm tra cho chắc
     if not SQLALCHEMY_DATABASE_URI:
         raise RuntimeError("DATABASE_URL is not set")
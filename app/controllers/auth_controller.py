@@ -1,7 +1,9 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
 from app.extensions.jwt import encode_access_token
+from app.extensions.rate_limit import rate_limiter
 from app.repositories.user_repository import UserRepository
+from app.services.password_hasher import PasswordHasherBusy
 from app.services.user_service import UserService
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
@@ -10,6 +12,7 @@ user_service = UserService(UserRepository(), jwt_encode=encode_access_token)
 
 
 @auth_bp.route("/register", methods=["POST"])
+@rate_limiter.limit("register")
 def register():
     data = request.get_json() or {}
     username = data.get("username", "").strip()
@@ -24,6 +27,8 @@ def register():
         result = user_service.register(username, password, full_name, role)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except PasswordHasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception:
         return jsonify({"error": "Lỗi server"}), 500
 
@@ -39,6 +44,7 @@ def register():
 
 
 @auth_bp.route("/login", methods=["POST"])
+@rate_limiter.limit("login", username_field="username")
 def login():
     data = request.get_json() or {}
     username = data.get("username", "").strip()
@@ -51,8 +57,10 @@ def login():
         result = user_service.login(username, password)
     except ValueError as e:
         return jsonify({"error": str(e)}), 401
+    except PasswordHasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
-        print("LOGIN ERROR:", repr(e))
+        current_app.logger.exception("Lỗi khi đăng nhập")
         return jsonify({"error": str(e)}), 500
 
 
@@ -1,76 +1,134 @@
 # backend/app/controllers/exam_controller.py
-from flask import Blueprint, jsonify, request
-
-from app.extensions.db import db
-from app.models.attempt_model import Answer, ExamAttempt
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, current_app, g, jsonify, request, stream_with_context
+from sqlalchemy.exc import IntegrityError
+
+from app.controllers import serializers
+from app.extensions.cache import payload_cache
+from app.extensions.compression import compressor
+from app.extensions.db import db, read_only, use_primary
+from app.extensions.etag import make_etag, not_modified, with_etag
+from app.extensions.jwt import auth_required
+from app.models.attempt_model import ExamAttempt
 from app.models.exam_model import Exam, Option, Question
 from app.models.user_model import User
 from app.repositories.exam_repository import ExamRepository
+from app.repositories.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_paginate
+from app.repositories.stats_repository import ExamStatsRepository
 from app.services.exam_pdf_service import ExamPdfParser
+from app.services.grading_service import GradingService
+from app.services.item_analysis_service import ItemAnalysisService
+from app.services.pdf_parse_cache import pdf_parse_cache
+from app.services.pdf_job_service import PdfJobQueueFull, pdf_job_manager
 
 exam_bp = Blueprint("exam", __name__, url_prefix="/api/exams")
 exam_repo = ExamRepository()
+stats_repo = ExamStatsRepository()
+grading_service = GradingService(exam_repo)
+item_analysis_service = ItemAnalysisService(exam_repo, grading_service)
 
 
 @exam_bp.route("", methods=["GET"])
+@read_only
 def list_exams():
-    exams = Exam.query.all()
-    return jsonify(
-        [
-            {
-                "id": e.id,
-                "title": e.title,
-                "description": e.description,
-                "duration": e.duration,
-            }
-            for e in exams
-        ]
+    args = (exam_repo.exams_query(), Exam.created_at, Exam.id, serializers.exam_summary)
+    if request.args.get("cursor"):
+        return _list_response(*args)
+
+    # Trang đầu ai cũng mở -> cache bytes JSON (kèm bản nén). Key gắn mốc version đọc từ DB
+    # (số đề, id lớn nhất) nên worker khác tạo / xóa đề thì cache ở mọi worker đều đổi key.
+    # Đọc mốc và build đều từ primary: dữ liệu trễ của replica không bị cache với mốc mới.
+    use_primary()
+    count, max_id = exam_repo.exams_version()
+    shape = "all" if _wants_all() else _page_limit()
+    cached = payload_cache.get_or_build(
+        f"exams:list:{shape}:{count}:{max_id}", "exams", lambda: current_app.json.dumps_bytes(_list_payload(*args))
     )
+    return compressor.cached_response(current_app.response_class, cached)
+
+
+def _wants_all() -> bool:
+    return request.args.get("all", "").lower() in ("1", "true", "yes")
+
+
+def _page_limit() -> int:
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _list_payload(query, sort_column, id_column, to_json):
+    """
+    Mặc định trả về 1 trang {"items": [...], "next_cursor": "..."} (keyset pagination,
+    tham số `limit` và `cursor`). `?all=true` trả về cả list như API cũ để giữ tương thích.
+    Cursor không hợp lệ -> ValueError.
+    """
+    if _wants_all():
+        rows = query.order_by(sort_column.desc().nulls_first(), id_column.desc()).all()  # Cùng thứ tự với trang
+        return [to_json(row) for row in rows]
+
+    page = keyset_paginate(query, sort_column, id_column, _page_limit(), request.args.get("cursor"))
+    return {"items": [to_json(row) for row in page.items], "next_cursor": page.next_cursor}
+
+
+def _list_response(query, sort_column, id_column, to_json):
+    try:
+        return jsonify(_list_payload(query, sort_column, id_column, to_json))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def _etag_list_response(etag, query, sort_column, id_column, to_json):
+    response = _list_response(query, sort_column, id_column, to_json)
+    if isinstance(response, tuple):  # Lỗi (cursor không hợp lệ) -> không gắn ETag
+        return response
+    return with_etag(response, etag, private=True)
 
 
 @exam_bp.route("/<int:exam_id>", methods=["GET"])
 def get_exam(exam_id: int):
-    exam = Exam.query.get_or_404(exam_id)
-
-    return jsonify(
-        {
-            "id": exam.id,
-            "title": exam.title,
-            "description": exam.description,
-            "duration": exam.duration,
-            "questions": [
-                {
-                    "id": q.id,
-                    "content": q.content,
-                    "question_type": q.question_type,
-                    "score": q.score,
-                    "options": [
-                        {
-                            "id": o.id,
-                            "content": o.content,
-                            # Không trả field is_correct ra UI để tránh lộ đáp án
-                        }
-                        for o in q.options
-                    ]
-                    if q.question_type == "mcq"
-                    else [],
-                }
-                for q in exam.questions
-            ],
-        }
+    version = exam_repo.get_exam_version(exam_id)
+    if version is None:
+        abort(404)
+    etag = make_etag("exam", exam_id, version.revision)
+    not_modified_response = not_modified(etag)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    def build():
+        exam = exam_repo.get_exam_tree(exam_id)
+        if exam is None:
+            return None
+        return current_app.json.dumps_bytes(serializers.exam_tree(exam))
+
+    # Cả lớp mở đề cùng lúc -> trả bytes JSON đã serialize sẵn từ cache.
+    # Không dùng @read_only: build từ replica đang trễ sẽ cache đề cũ với version mới.
+    # Key gắn revision: worker khác chưa thấy invalidate cũng không trả body cũ kèm ETag mới
+    cached = payload_cache.get_or_build(
+        f"exam:{exam_id}:student:r{version.revision}", f"exam:{exam_id}", build
     )
+    if cached is None:
+        abort(404)
+
+    return with_etag(compressor.cached_response(current_app.response_class, cached), etag)
 
 
 @exam_bp.route("/create", methods=["POST"])
+@auth_required("teacher")
 def create_exam():
     data = request.get_json() or {}
-    created_by = data.get("created_by")  # user_id của người tạo
+    created_by = g.user_id
 
     if not data.get("title") or not data.get("questions"):
         return jsonify({"error": "Tiêu đề và câu hỏi không được để trống"}), 400
 
     try:
         new_exam = exam_repo.create_full_exam(data, created_by=created_by)
+        payload_cache.invalidate(f"exam:{new_exam.id}")
+        payload_cache.invalidate("exams")
         return (
             jsonify(
                 {
@@ -84,34 +142,58 @@ def create_exam():
         return jsonify({"error": "Lỗi Server", "details": str(e)}), 500
 
 
+@exam_bp.route("/batch-create", methods=["POST"])
+@auth_required("teacher")
+def batch_create_exams():
+    """Import nhiều đề cùng lúc trong 1 transaction: lỗi 1 đề thì không đề nào được lưu."""
+    data = request.get_json() or {}
+    created_by = g.user_id
+    exams = data.get("exams")
+
+    if not isinstance(exams, list) or not exams:
+        return jsonify({"error": "Danh sách đề thi không được để trống"}), 400
+    for index, exam_data in enumerate(exams):
+        if not isinstance(exam_data, dict) or not exam_data.get("title") or not exam_data.get("questions"):
+            return jsonify({"error": "Tiêu đề và câu hỏi không được để trống", "index": index}), 400
+
+    try:
+        exam_ids = exam_repo.create_many_exams(exams, created_by=created_by)
+        for exam_id in exam_ids:
+            payload_cache.invalidate(f"exam:{exam_id}")
+        payload_cache.invalidate("exams")
+        return (
+            jsonify(
+                {
+                    "message": f"Tạo {len(exam_ids)} đề thi thành công!",
+                    "exam_ids": exam_ids,
+                }
+            ),
+            201,
+        )
+    except Exception as e:
+        return jsonify({"error": "Lỗi Server", "details": str(e)}), 500
+
+
 @exam_bp.route("/<int:exam_id>/start", methods=["POST"])
+@auth_required()
 def start_exam(exam_id: int):
-    data = request.get_json() or {}
-    user_id = data.get("user_id")
-    if not user_id:
-        return jsonify({"error": "user_id là bắt buộc để bắt đầu làm bài"}), 400
+    # 1 câu lệnh: tạo mới hoặc trả về attempt đang mở (an toàn khi bấm "Bắt đầu" nhiều lần)
+    try:
+        result = exam_repo.start_or_resume_attempt(exam_id, g.user_id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Tài khoản không tồn tại"}), 400
 
-    exam = Exam.query.get_or_404(exam_id)
-    
-    # Kiểm tra xem đã có attempt chưa hoàn thành chưa (chưa có end_time)
-    existing_attempt = ExamAttempt.query.filter_by(
-        exam_id=exam.id,
-        user_id=user_id,
-        end_time=None
-    ).first()
-    
-    if existing_attempt:
-        # Trả về attempt đã có thay vì tạo mới
-        return jsonify({"attempt_id": existing_attempt.id}), 200
-    
-    attempt = ExamAttempt(exam_id=exam.id, user_id=user_id)
-    db.session.add(attempt)
-    db.session.commit()
+    if result is None:
+        abort(404)
 
-    return jsonify({"attempt_id": attempt.id}), 201
+    attempt_id, created = result
+    return jsonify({"attempt_id": attempt_id}), 201 if created else 200
 
 
 @exam_bp.route("/<int:exam_id>/submit", methods=["POST"])
+@auth_required()
 def submit_exam(exam_id: int):
     data = request.get_json() or {}
     attempt_id = data.get("attempt_id")
@@ -120,53 +202,83 @@ def submit_exam(exam_id: int):
     attempt = ExamAttempt.query.get_or_404(attempt_id)
     if attempt.exam_id != exam_id:
         return jsonify({"error": "attempt_id không thuộc exam này"}), 400
+    if attempt.user_id != g.user_id:
+        return jsonify({"error": "Bạn không có quyền nộp bài làm này"}), 403
 
-    total_score = 0.0
-
-    for ans in answers_payload:
-        question_id = ans.get("question_id")
-        selected_option_id = ans.get("selected_option_id")
-        essay_answer = ans.get("essay_answer")
+    # Nộp lại (client retry) -> trả về kết quả đã chấm, không chấm lại
+    if attempt.end_time is not None:
+        return jsonify({"message": "Bài làm đã được nộp", "total_score": attempt.total_score}), 200
 
-        if not question_id:
-            continue
+    # Đóng bài trước khi chấm: request nộp trùng chạy song song chỉ 1 request đóng được,
+    # request còn lại trả về kết quả đã lưu (không chấm / cộng thống kê lần 2)
+    end_time = datetime.utcnow()
+    if not exam_repo.close_attempt(attempt.id, end_time):
+        db.session.rollback()  # Nạp lại attempt từ dòng đã commit
+        return jsonify({"message": "Bài làm đã được nộp", "total_score": attempt.total_score}), 200
 
-        question = Question.query.get(question_id)
-        if not question:
-            continue
+    # Answer key được cache theo đề -> không query từng câu hỏi / đáp án
+    answer_key = grading_service.get_answer_key(exam_id)
 
-        score = 0.0
+    # Câu trả lời đã được autosave trong lúc làm bài. Payload (nếu có) là trạng thái mới nhất của
+    # client: câu nào có trong payload thì ghi đè bản autosave (kể cả selected_option_id /
+    # essay_answer thiếu / không hợp lệ = bỏ chọn), câu không có trong payload giữ nguyên bản autosave.
+    exam_repo.upsert_answers(grading_service.normalize_answers(answer_key, attempt.id, answers_payload))
 
-        if question.question_type == "mcq" and selected_option_id:
-            option = Option.query.get(selected_option_id)
-            if option and option.is_correct:
-                score = question.score
-
-        if question.question_type == "essay":
-            # Tạm thời chưa chấm tự luận, để 0 hoặc sau này chấm tay
-            score = 0.0
-
-        answer = Answer(
-            attempt_id=attempt.id,
-            question_id=question.id,
-            selected_option_id=selected_option_id,
-            essay_answer=essay_answer,
-            score=score,
-        )
-        db.session.add(answer)
-        total_score += score
+    stored_answers = exam_repo.get_attempt_answer_choices(attempt.id)
+    updates, total_score = grading_service.grade_stored_answers(answer_key, stored_answers)
+    exam_repo.bulk_update_answer_scores(updates)
 
     attempt.total_score = total_score
-    from datetime import datetime
-    attempt.end_time = datetime.utcnow()
+    attempt.end_time = end_time
+    stats_repo.record_submission(
+        exam_id, total_score, [(row.question_id, u["score"]) for row, u in zip(stored_answers, updates)]
+    )
     db.session.commit()
 
     return jsonify({"message": "Nộp bài thành công", "total_score": total_score}), 200
 
 
+@exam_bp.route("/attempts/<int:attempt_id>/answers", methods=["PUT"])
+@auth_required()
+def autosave_answers(attempt_id: int):
+    """
+    Lưu tạm câu trả lời trong lúc làm bài (autosave).
+
+    Client gom các lần chọn trong vài giây rồi gửi 1 batch `{"answers": [...]}`;
+    server gộp các lần chọn lại cùng câu và upsert bằng 1 câu lệnh, dòng không đổi thì bỏ qua.
+    """
+    data = request.get_json() or {}
+    answers_payload = data.get("answers", [])
+
+    attempt = ExamAttempt.query.get_or_404(attempt_id)
+    if attempt.user_id != g.user_id:
+        return jsonify({"error": "Bạn không có quyền sửa bài làm này"}), 403
+    if attempt.end_time is not None:
+        return jsonify({"error": "Bài làm đã được nộp"}), 409
+
+    answer_key = grading_service.get_answer_key(attempt.exam_id)
+    rows = grading_service.normalize_answers(answer_key, attempt.id, answers_payload)
+
+    try:
+        # Lần kiểm tra end_time ở trên đọc không khóa: nộp bài song song có thể đã đóng attempt
+        if not exam_repo.lock_open_attempt(attempt.id):
+            db.session.rollback()
+            return jsonify({"error": "Bài làm đã được nộp"}), 409
+        saved = exam_repo.upsert_answers(rows)
+        if saved:
+            attempt.updated_at = datetime.utcnow()  # Danh sách bài làm của giáo viên có câu trả lời
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Lỗi khi lưu câu trả lời", "details": str(e)}), 500
+
+    return jsonify({"message": "Đã lưu", "received": len(rows), "saved": saved}), 200
+
+
 # ... (Các import giữ nguyên)
 
 @exam_bp.route("/parse-pdf", methods=["POST"])
+@auth_required("teacher")
 def parse_exam_pdf():
     if "file" not in request.files:
         return jsonify({"error": "Vui lòng chọn file PDF"}), 400
@@ -179,14 +291,15 @@ def parse_exam_pdf():
         return jsonify({"error": "Chỉ hỗ trợ file PDF"}), 400
 
     try:
-        # pdfplumber yêu cầu một file-like object thực thụ
-        # request.files['file'] hoạt động tốt, nhưng để chắc chắn ta không cần seek(0) ở đây
-        # vì flask đã handle việc đó rồi.
-        
-        parser = ExamPdfParser()
-        
-        # Truyền trực tiếp stream vào parser
-        questions = parser.parse_file(file)
+        data = file.read()
+
+        # Upload lại đúng file cũ -> lấy kết quả từ cache theo SHA-256, không parse lại
+        cache_key = pdf_parse_cache.key(data)
+        questions = pdf_parse_cache.get(cache_key)
+        if questions is None:
+            questions = ExamPdfParser().parse_file(io.BytesIO(data))
+            if questions:
+                pdf_parse_cache.set(cache_key, questions)
         
         if not questions:
             return jsonify({
@@ -201,28 +314,114 @@ def parse_exam_pdf():
         }), 200
         
     except Exception as e:
-        print(f"Server Error Parse PDF: {str(e)}") # Log lỗi ra terminal để debug
+        current_app.logger.exception("Lỗi khi parse file PDF")
         return jsonify({
             "error": "Lỗi khi xử lý file PDF", 
             "details": str(e)
         }), 500
 
 
+@exam_bp.route("/parse-pdf/stream", methods=["POST"])
+@auth_required("teacher")
+def stream_parse_exam_pdf():
+    """
+    Parse PDF và trả về từng câu hỏi ngay khi đọc được (NDJSON, mỗi dòng 1 câu hỏi),
+    client hiển thị dần thay vì chờ parse xong cả file.
+    """
+    if "file" not in request.files:
+        return jsonify({"error": "Vui lòng chọn file PDF"}), 400
+
+    file = request.files["file"]
+    if not file or not file.filename:
+        return jsonify({"error": "Không có file được upload"}), 400
+
+    if not file.filename.lower().endswith(".pdf"):
+        return jsonify({"error": "Chỉ hỗ trợ file PDF"}), 400
+
+    # Đọc file upload vào bộ nhớ trước: stream của request có thể bị đóng trước khi generator chạy xong
+    data = file.read()
+    cache_key = pdf_parse_cache.key(data)
+    cached_questions = pdf_parse_cache.get(cache_key)
+
+    def generate():
+        questions = []
+        try:
+            source = cached_questions if cached_questions is not None else ExamPdfParser().iter_questions(io.BytesIO(data))
+            for question in source:
+                questions.append(question)
+                yield json.dumps(question, ensure_ascii=False) + "\n"
+        except Exception as e:
+            current_app.logger.exception("Lỗi khi parse file PDF (stream)")
+            yield json.dumps({"error": "Lỗi khi xử lý file PDF", "details": str(e)}, ensure_ascii=False) + "\n"
+            return
+
+        if questions and cached_questions is None:
+            pdf_parse_cache.set(cache_key, questions)
+
+        if not questions:
+            yield json.dumps(
+                {"error": "Không nhận diện được câu hỏi nào. Vui lòng kiểm tra định dạng file."},
+                ensure_ascii=False,
+            ) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@exam_bp.route("/parse-pdf/jobs", methods=["POST"])
+@auth_required("teacher")
+def create_parse_pdf_job():
+    """
+    Upload PDF để parse chạy nền, trả về job_id ngay (202).
+    Client poll GET /parse-pdf/jobs/<job_id> để lấy danh sách câu hỏi.
+    """
+    if "file" not in request.files:
+        return jsonify({"error": "Vui lòng chọn file PDF"}), 400
+
+    file = request.files["file"]
+    if not file or not file.filename:
+        return jsonify({"error": "Không có file được upload"}), 400
+
+    if not file.filename.lower().endswith(".pdf"):
+        return jsonify({"error": "Chỉ hỗ trợ file PDF"}), 400
+
+    try:
+        job = pdf_job_manager.submit(file.read(), file.filename)
+    except PdfJobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({"job_id": job["job_id"], "status": job["status"]}), 202
+
+
+@exam_bp.route("/parse-pdf/jobs/<job_id>", methods=["GET"])
+@auth_required("teacher")
+def get_parse_pdf_job(job_id: str):
+    job = pdf_job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Không tìm thấy job"}), 404
+
+    if job["status"] == "done" and not job.get("questions"):
+        job = dict(
+            job,
+            status="failed",
+            error="Không nhận diện được câu hỏi nào. Vui lòng kiểm tra định dạng file.",
+            hint="Hỗ trợ định dạng: 'Câu 1:', '1.', 'Bài 1' và đáp án 'A.', 'B.', 'C.', 'D.'",
+        )
+    return jsonify(job), 200
+
+
 @exam_bp.route("/<int:exam_id>", methods=["DELETE"])
+@auth_required("teacher")
 def delete_exam(exam_id: int):
     """Xóa đề thi. Chỉ giáo viên tạo đề mới được xóa."""
-    data = request.get_json() or {}
-    user_id = data.get("user_id") or request.args.get("user_id", type=int)
-    if not user_id:
-        return jsonify({"error": "user_id là bắt buộc"}), 400
-
     exam = Exam.query.get_or_404(exam_id)
-    if exam.created_by != user_id:
+    if exam.created_by != g.user_id:
         return jsonify({"error": "Bạn không có quyền xóa đề này"}), 403
 
     try:
         db.session.delete(exam)
         db.session.commit()
+        payload_cache.invalidate(f"exam:{exam_id}")
+        payload_cache.invalidate("exams")
         return jsonify({"message": "Đã xóa đề thi thành công"}), 200
     except Exception as e:
         db.session.rollback()
@@ -230,132 +429,153 @@ def delete_exam(exam_id: int):
 
 
 @exam_bp.route("/my-created", methods=["GET"])
+@read_only
+@auth_required("teacher")
 def get_my_created_exams():
     """Lấy danh sách đề mà giáo viên đã tạo."""
-    user_id = request.args.get("user_id", type=int)
-    if not user_id:
-        return jsonify({"error": "user_id là bắt buộc"}), 400
-
-    exams = Exam.query.filter_by(created_by=user_id).order_by(Exam.created_at.desc()).all()
-    return jsonify(
-        [
-            {
-                "id": e.id,
-                "title": e.title,
-                "description": e.description,
-                "duration": e.duration,
-                "created_at": e.created_at.isoformat() if e.created_at else None,
-            }
-            for e in exams
-        ]
+    return _list_response(
+        exam_repo.exams_query(created_by=g.user_id),
+        Exam.created_at,
+        Exam.id,
+        lambda e: serializers.exam_summary(e, include_created_at=True),
     )
 
 
 @exam_bp.route("/my-attempts", methods=["GET"])
+@read_only
+@auth_required()
 def get_my_attempts():
     """Lấy danh sách đề mà user đã làm."""
-    user_id = request.args.get("user_id", type=int)
-    if not user_id:
-        return jsonify({"error": "user_id là bắt buộc"}), 400
-
-    attempts = (
-        ExamAttempt.query.filter_by(user_id=user_id)
-        .order_by(ExamAttempt.start_time.desc())
-        .all()
-    )
-    return jsonify(
-        [
-            {
-                "attempt_id": a.id,
-                "exam_id": a.exam_id,
-                "exam_title": a.exam.title if a.exam else None,
-                "total_score": a.total_score,
-                "start_time": a.start_time.isoformat() if a.start_time else None,
-                "end_time": a.end_time.isoformat() if a.end_time else None,
-            }
-            for a in attempts
-        ]
+    etag = make_etag("my-attempts", g.user_id, *exam_repo.user_attempts_version(g.user_id))
+    not_modified_response = not_modified(etag, private=True)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    return _etag_list_response(
+        etag,
+        exam_repo.user_attempts_query(g.user_id),
+        ExamAttempt.start_time,
+        ExamAttempt.id,
+        serializers.my_attempt_dict,
     )
 
 
+
 @exam_bp.route("/<int:exam_id>/detail", methods=["GET"])
+@read_only
+@auth_required("teacher")
 def get_exam_detail_with_answers(exam_id: int):
     """Lấy chi tiết đề với đáp án đúng (chỉ dành cho giáo viên tạo đề)."""
-    user_id = request.args.get("user_id", type=int)
-
-    exam = Exam.query.get_or_404(exam_id)
-    if exam.created_by != user_id:
+    exam = exam_repo.get_exam_tree(exam_id)
+    if exam is None:
+        abort(404)
+    if exam.created_by != g.user_id:
         return jsonify({"error": "Bạn không có quyền xem đề này"}), 403
 
-    return jsonify(
-        {
-            "id": exam.id,
-            "title": exam.title,
-            "description": exam.description,
-            "duration": exam.duration,
-            "questions": [
-                {
-                    "id": q.id,
-                    "content": q.content,
-                    "question_type": q.question_type,
-                    "score": q.score,
-                    "options": [
-                        {
-                            "id": o.id,
-                            "content": o.content,
-                            "is_correct": o.is_correct,
-                        }
-                        for o in q.options
-                    ]
-                    if q.question_type == "mcq"
-                    else [],
-                }
-                for q in exam.questions
-            ],
-        }
-    )
+    return jsonify(serializers.exam_tree(exam, include_correct=True))
 
 
 @exam_bp.route("/<int:exam_id>/attempts", methods=["GET"])
+@read_only
+@auth_required("teacher")
 def get_exam_attempts(exam_id: int):
     """Lấy danh sách bài làm của học sinh cho một đề (chỉ giáo viên tạo đề)."""
-    user_id = request.args.get("user_id", type=int)
-
-    exam = Exam.query.get_or_404(exam_id)
-    if exam.created_by != user_id:
+    version = exam_repo.get_exam_version(exam_id)
+    if version is None:
+        abort(404)
+    if version.created_by != g.user_id:
         return jsonify({"error": "Bạn không có quyền xem bài làm này"}), 403
 
-    attempts = (
-        ExamAttempt.query.filter_by(exam_id=exam_id)
-        .order_by(ExamAttempt.start_time.desc())
-        .all()
+    # Chấm lại khi sửa đáp án tăng revision của đề; nộp / chấm tay / autosave đổi updated_at
+    etag = make_etag("attempts", exam_id, version.revision, *exam_repo.exam_attempts_version(exam_id))
+    not_modified_response = not_modified(etag, private=True)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    return _etag_list_response(
+        etag,
+        exam_repo.exam_attempts_query(exam_id),
+        ExamAttempt.start_time,
+        ExamAttempt.id,
+        serializers.exam_attempt_dict,
     )
 
-    return jsonify(
-        [
-            {
-                "attempt_id": a.id,
-                "student_id": a.user_id,
-                "student_name": a.student.username if a.student else None,
-                "total_score": a.total_score,
-                "start_time": a.start_time.isoformat() if a.start_time else None,
-                "end_time": a.end_time.isoformat() if a.end_time else None,
-                "answers": [
-                    {
-                        "question_id": ans.question_id,
-                        "selected_option_id": ans.selected_option_id,
-                        "essay_answer": ans.essay_answer,
-                        "score": ans.score,
-                    }
-                    for ans in a.answers
-                ],
-            }
-            for a in attempts
-        ]
+
+@exam_bp.route("/<int:exam_id>/stats", methods=["GET"])
+@read_only
+@auth_required("teacher")
+def get_exam_stats(exam_id: int):
+    """Điểm trung bình, phổ điểm và tỉ lệ đúng từng câu (đọc từ bảng thống kê, không quét bài làm)."""
+    exam = Exam.query.get_or_404(exam_id)
+    if exam.created_by != g.user_id:
+        return jsonify({"error": "Bạn không có quyền xem thống kê đề này"}), 403
+    return jsonify(stats_repo.get_exam_stats(exam_id)), 200
+
+
+@exam_bp.route("/<int:exam_id>/item-analysis", methods=["GET"])
+@read_only
+@auth_required("teacher")
+def get_item_analysis(exam_id: int):
+    """Độ khó, độ phân biệt, tần suất chọn đáp án từng câu và Cronbach's alpha của đề."""
+    exam = Exam.query.get_or_404(exam_id)
+    if exam.created_by != g.user_id:
+        return jsonify({"error": "Bạn không có quyền xem thống kê đề này"}), 403
+    return jsonify(item_analysis_service.analyze(exam_id)), 200
+
+
+@exam_bp.route("/<int:exam_id>/attempts/export", methods=["GET"])
+@read_only
+@auth_required("teacher")
+def export_exam_results(exam_id: int):
+    """
+    Xuất kết quả thi dạng CSV hoặc NDJSON (`?format=csv|ndjson`), stream từng dòng
+    nên tải được cả đề có hàng trăm nghìn câu trả lời mà không giữ hết trong RAM.
+    """
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in ("csv", "ndjson"):
+        return jsonify({"error": "format chỉ hỗ trợ 'csv' hoặc 'ndjson'"}), 400
+
+    exam = Exam.query.get_or_404(exam_id)
+    if exam.created_by != g.user_id:
+        return jsonify({"error": "Bạn không có quyền xem bài làm này"}), 403
+
+    columns = ExamRepository.RESULT_EXPORT_COLUMNS
+    rows = exam_repo.iter_exam_results(exam_id)
+
+    def _value(value):
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for i, row in enumerate(rows, start=1):
+            writer.writerow([_value(v) for v in row])
+            # Gom khoảng 500 dòng rồi mới gửi để tránh quá nhiều chunk nhỏ
+            if i % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(dict(zip(columns, (_value(v) for v in row))), ensure_ascii=False) + "\n"
+
+    if export_format == "csv":
+        body, mimetype, ext = generate_csv(), "text/csv", "csv"
+    else:
+        body, mimetype, ext = generate_ndjson(), "application/x-ndjson", "ndjson"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="exam_{exam_id}_results.{ext}"'},
     )
 
 
 @exam_bp.route("/attempts/<int:attempt_id>/grade", methods=["POST"])
+@auth_required("teacher")
 def grade_essay_answer(attempt_id: int):
     """Chấm điểm cho câu tự luận."""
     data = request.get_json() or {}
@@ -369,36 +589,40 @@ def grade_essay_answer(attempt_id: int):
     exam = attempt.exam
 
     # Kiểm tra quyền: chỉ giáo viên tạo đề mới chấm được
-    teacher_id = data.get("teacher_id")
-    if exam.created_by != teacher_id:
+    if exam.created_by != g.user_id:
         return jsonify({"error": "Bạn không có quyền chấm bài này"}), 403
 
-    answer = Answer.query.filter_by(attempt_id=attempt_id, question_id=question_id).first()
+    answer = exam_repo.get_answer(attempt_id, question_id)
     if not answer:
         return jsonify({"error": "Không tìm thấy câu trả lời"}), 404
 
     old_score = answer.score or 0.0
+    old_total = attempt.total_score or 0.0
     answer.score = float(score)
 
     # Cập nhật tổng điểm
-    attempt.total_score = (attempt.total_score or 0.0) - old_score + float(score)
+    attempt.total_score = old_total - old_score + float(score)
+    if attempt.end_time is not None:
+        stats_repo.record_answer_regrade(
+            exam.id, question_id, old_score, answer.score, old_total, attempt.total_score
+        )
     db.session.commit()
 
     return jsonify({"message": "Chấm điểm thành công", "total_score": attempt.total_score}), 200
 
 
 @exam_bp.route("/<int:exam_id>/update-answer", methods=["POST"])
+@auth_required("teacher")
 def update_exam_answer(exam_id: int):
     """
     Sửa đáp án đúng và TỰ ĐỘNG CHẤM LẠI ĐIỂM cho tất cả bài làm.
     """
     data = request.get_json() or {}
-    user_id = data.get("user_id")
     question_id = data.get("question_id")
     correct_option_id = data.get("correct_option_id")
 
     exam = Exam.query.get_or_404(exam_id)
-    if exam.created_by != user_id:
+    if exam.created_by != g.user_id:
         return jsonify({"error": "Bạn không có quyền sửa đề này"}), 403
 
     question = Question.query.filter_by(id=question_id, exam_id=exam_id).first()
@@ -409,103 +633,47 @@ def update_exam_answer(exam_id: int):
         return jsonify({"error": "Chỉ có thể sửa đáp án trắc nghiệm"}), 400
 
     try:
-        # --- BƯỚC 1: Cập nhật đáp án đúng trong bảng Option ---
-        # Reset tất cả options của câu hỏi này về False
-        for opt in question.options:
-            opt.is_correct = False
-        
-        # Set option mới thành True
         new_correct_option = Option.query.filter_by(id=correct_option_id, question_id=question_id).first()
         if not new_correct_option:
             return jsonify({"error": "Không tìm thấy đáp án được chọn"}), 404
-        
-        new_correct_option.is_correct = True
-        
-        # --- BƯỚC 2: Rà soát và chấm lại điểm (Re-grade) ---
-        # Lấy tất cả bài làm của đề thi này
-        attempts = ExamAttempt.query.filter_by(exam_id=exam_id).all()
-        
-        count_updated = 0
-        
-        for attempt in attempts:
-            # Tìm câu trả lời của học sinh cho câu hỏi này
-            # (Lọc trong list answers của attempt để tránh query nhiều lần)
-            student_answer = next((a for a in attempt.answers if a.question_id == question_id), None)
-            
-            if student_answer:
-                # Kiểm tra lại đáp án
-                old_score = student_answer.score
-                
-                if student_answer.selected_option_id == correct_option_id:
-                    # Nếu chọn đúng đáp án mới -> Full điểm
-                    student_answer.score = question.score
-                else:
-                    # Nếu chọn sai -> 0 điểm
-                    student_answer.score = 0.0
-                
-                # Cập nhật tổng điểm của bài làm (trừ điểm cũ, cộng điểm mới)
-                attempt.total_score = (attempt.total_score or 0.0) - (old_score or 0.0) + student_answer.score
-                count_updated += 1
+
+        # Cập nhật đáp án + chấm lại toàn bộ bài làm bằng vài câu UPDATE (set-based)
+        old_totals = stats_repo.submitted_totals_for_question(exam_id, question_id)
+        result = exam_repo.regrade_question(exam_id, question_id, correct_option_id, question.score or 0.0)
+        exam_repo.bump_exam_revision(exam_id)
+
+        # Thống kê: chỉ cập nhật các bài có trả lời câu này
+        if old_totals:
+            new_totals = stats_repo.submitted_totals_for_question(exam_id, question_id)
+            stats_repo.apply_score_changes(
+                exam_id, [(old_totals[attempt_id], new_totals[attempt_id]) for attempt_id in old_totals]
+            )
+            stats_repo.refresh_question(exam_id, question_id)
 
         db.session.commit()
+        payload_cache.invalidate(f"exam:{exam_id}")
 
         return jsonify({
             "message": "Cập nhật đáp án thành công", 
-            "re_graded_count": count_updated
+            "re_graded_count": result["attempts_updated"],
+            "answers_updated": result["answers_updated"],
         }), 200
 
     except Exception as e:
         db.session.rollback()
-        print(f"Error update answer: {str(e)}")
+        current_app.logger.exception("Lỗi khi cập nhật đáp án đề %s", exam_id)
         return jsonify({"error": "Lỗi server khi cập nhật đáp án", "details": str(e)}), 500
 
 
 @exam_bp.route("/attempts/<int:attempt_id>", methods=["GET"])
+@read_only
+@auth_required()
 def get_attempt_detail(attempt_id: int):
     """Lấy chi tiết một bài làm (cho học sinh xem lại)."""
-    user_id = request.args.get("user_id", type=int)
-    if not user_id:
-        return jsonify({"error": "user_id là bắt buộc"}), 400
-
-    attempt = ExamAttempt.query.get_or_404(attempt_id)
-    if attempt.user_id != user_id:
+    attempt = exam_repo.get_attempt_with_exam_tree(attempt_id)
+    if attempt is None:
+        abort(404)
+    if attempt.user_id != g.user_id:
         return jsonify({"error": "Bạn không có quyền xem bài làm này"}), 403
 
-    exam = attempt.exam
-    return jsonify(
-        {
-            "attempt_id": attempt.id,
-            "exam_id": exam.id,
-            "exam_title": exam.title,
-            "total_score": attempt.total_score,
-            "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
-            "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
-            "questions": [
-                {
-                    "id": q.id,
-                    "content": q.content,
-                    "question_type": q.question_type,
-                    "score": q.score,
-                    "options": [
-                        {
-                            "id": o.id,
-                            "content": o.content,
-                        }
-                        for o in q.options
-                    ]
-                    if q.question_type == "mcq"
-                    else [],
-                }
-                for q in exam.questions
-            ],
-            "answers": [
-                {
-                    "question_id": ans.question_id,
-                    "selected_option_id": ans.selected_option_id,
-                    "essay_answer": ans.essay_answer,
-                    "score": ans.score,
-                }
-                for ans in attempt.answers
-            ],
-        }
-    )
+    return jsonify(serializers.attempt_detail(attempt))
@@ -0,0 +1,42 @@
+from flask import Blueprint, current_app, jsonify
+
+from app.extensions.cache import payload_cache
+from app.extensions.compression import compressor
+from app.extensions.db import db
+from app.extensions.db_pool import pool_metrics
+from app.extensions.rate_limit import rate_limiter
+from app.extensions.request_metrics import request_metrics
+
+metrics_bp = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+
+@metrics_bp.route("", methods=["GET"])
+def prometheus_metrics():
+    """Số liệu của process hiện tại theo Prometheus text format (request, SQL, pool, rate limit, cache)."""
+    body = request_metrics.render_prometheus(
+        {
+            "db_pool": pool_metrics.stats(db.engine.pool),
+            "rate_limit": rate_limiter.stats(),
+            "compression": compressor.stats(),
+            "payload_cache": payload_cache.stats(),
+        }
+    )
+    return current_app.response_class(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@metrics_bp.route("/db-pool", methods=["GET"])
+def db_pool_metrics():
+    """Thời gian chờ checkout connection và mức độ bão hòa pool của process hiện tại."""
+    return jsonify(pool_metrics.stats(db.engine.pool)), 200
+
+
+@metrics_bp.route("/rate-limit", methods=["GET"])
+def rate_limit_metrics():
+    """Số request đăng nhập / đăng ký được cho qua và bị chặn (429) theo IP / username."""
+    return jsonify(rate_limiter.stats()), 200
+
+
+@metrics_bp.route("/compression", methods=["GET"])
+def compression_metrics():
+    """Số response đã nén, tổng byte trước / sau khi nén và số lần nén payload trong cache."""
+    return jsonify(dict(compressor.stats(), payload_cache=payload_cache.stats())), 200
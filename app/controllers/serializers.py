@@ -0,0 +1,97 @@
+"""
+Chuyển model -> dict JSON, dùng chung cho mọi endpoint để mỗi dạng payload chỉ viết 1 lần.
+
+Hàm nhận object có đủ attribute (model ORM hoặc row), không tự lazy-load thêm gì ngoài
+các relationship được nêu rõ (exam.questions, question.options, attempt.answers, ...);
+controller phải eager-load trước.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def exam_summary(exam, include_created_at: bool = False) -> Dict[str, Any]:
+    data = {
+        "id": exam.id,
+        "title": exam.title,
+        "description": exam.description,
+        "duration": exam.duration,
+    }
+    if include_created_at:
+        data["created_at"] = isoformat(exam.created_at)
+    return data
+
+
+def option_dict(option, include_correct: bool = False) -> Dict[str, Any]:
+    data = {"id": option.id, "content": option.content}
+    if include_correct:
+        data["is_correct"] = option.is_correct
+    return data
+
+
+def question_dict(question, include_correct: bool = False) -> Dict[str, Any]:
+    return {
+        "id": question.id,
+        "content": question.content,
+        "question_type": question.question_type,
+        "score": question.score,
+        "options": [option_dict(o, include_correct) for o in question.options]
+        if question.question_type == "mcq"
+        else [],
+    }
+
+
+def exam_tree(exam, include_correct: bool = False) -> Dict[str, Any]:
+    """Đề kèm câu hỏi / đáp án. include_correct=False cho học sinh (không lộ đáp án đúng)."""
+    data = exam_summary(exam)
+    data["questions"] = [question_dict(q, include_correct) for q in exam.questions]
+    return data
+
+
+def answer_dict(answer) -> Dict[str, Any]:
+    return {
+        "question_id": answer.question_id,
+        "selected_option_id": answer.selected_option_id,
+        "essay_answer": answer.essay_answer,
+        "score": answer.score,
+    }
+
+
+def attempt_summary(attempt) -> Dict[str, Any]:
+    return {
+        "attempt_id": attempt.id,
+        "exam_id": attempt.exam_id,
+        "total_score": attempt.total_score,
+        "start_time": isoformat(attempt.start_time),
+        "end_time": isoformat(attempt.end_time),
+    }
+
+
+def my_attempt_dict(attempt) -> Dict[str, Any]:
+    """Dòng trong "Bài thi của tôi" (cần attempt.exam)."""
+    data = attempt_summary(attempt)
+    data["exam_title"] = attempt.exam.title if attempt.exam else None
+    return data
+
+
+def exam_attempt_dict(attempt) -> Dict[str, Any]:
+    """Bài làm của 1 học sinh trong danh sách bài làm của đề (cần attempt.student, attempt.answers)."""
+    data = attempt_summary(attempt)
+    del data["exam_id"]
+    data["student_id"] = attempt.user_id
+    data["student_name"] = attempt.student.username if attempt.student else None
+    data["answers"] = [answer_dict(a) for a in attempt.answers]
+    return data
+
+
+def attempt_detail(attempt) -> Dict[str, Any]:
+    """Học sinh xem lại bài làm: đề (không có đáp án đúng) + câu trả lời (cần attempt.exam đã nạp cây đề)."""
+    exam = attempt.exam
+    data = attempt_summary(attempt)
+    data["exam_title"] = exam.title
+    data["questions"] = [question_dict(q) for q in exam.questions]
+    data["answers"] = [answer_dict(a) for a in attempt.answers]
+    return data
@@ -0,0 +1,186 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class CachedPayload:
+    """Body JSON đã serialize sẵn, gắn với version của scope lúc build."""
+
+    body: bytes
+    version: int
+    # Body đã nén theo Content-Encoding ("gzip", "br"), nén lần đầu có client yêu cầu
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    encode_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+class InMemoryBackend:
+    """Backend dùng chung chạy trong process (thay thế Redis khi test / chạy local)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._values: Dict[str, bytes] = {}
+
+    def get_version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump_version(self, scope: str) -> int:
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            return self._versions[scope]
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._values.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._values[key] = value
+
+
+class RedisBackend:
+    """Backend dùng chung giữa các gunicorn worker (cần cài package `redis`)."""
+
+    def __init__(self, url: str, prefix: str = "webkiemtra:") -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get_version(self, scope: str) -> int:
+        value = self._client.get(f"{self._prefix}ver:{scope}")
+        return int(value) if value is not None else 0
+
+    def bump_version(self, scope: str) -> int:
+        return int(self._client.incr(f"{self._prefix}ver:{scope}"))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(f"{self._prefix}{key}")
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._client.set(f"{self._prefix}{key}", value, ex=ttl)
+
+
+def create_backend(url: Optional[str]):
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryBackend()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    raise RuntimeError(f"CACHE_BACKEND_URL không hỗ trợ: {url}")
+
+
+class PayloadCache:
+    """
+    LRU giới hạn số phần tử, lưu bytes JSON đã serialize.
+
+    Mỗi entry gắn với version của một scope (VD: "exam:5"). Khi dữ liệu thay đổi
+    chỉ cần `invalidate(scope)` để tăng version, các entry cũ tự động hết hiệu lực.
+    Nếu có backend dùng chung thì version và body được chia sẻ giữa các worker.
+    """
+
+    def __init__(self, maxsize: int = 256, backend=None, shared_ttl: int = 3600) -> None:
+        self.maxsize = maxsize
+        self.backend = backend
+        self.shared_ttl = shared_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self._local_versions: Dict[str, int] = {}
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0, "encodes": 0}
+
+    def init_app(self, app) -> None:
+        self.maxsize = app.config.get("PAYLOAD_CACHE_SIZE", self.maxsize)
+        self.shared_ttl = app.config.get("PAYLOAD_CACHE_SHARED_TTL", self.shared_ttl)
+        self.backend = create_backend(app.config.get("CACHE_BACKEND_URL"))
+        self.clear()
+        app.extensions["payload_cache"] = self
+
+    # --- Version ---
+    def version(self, scope: str) -> int:
+        if self.backend is not None:
+            return self.backend.get_version(scope)
+        return self._local_versions.get(scope, 0)
+
+    def invalidate(self, scope: str) -> None:
+        with self._lock:
+            if self.backend is not None:
+                self.backend.bump_version(scope)
+            else:
+                self._local_versions[scope] = self._local_versions.get(scope, 0) + 1
+            self._stats["invalidations"] += 1
+
+    # --- Đọc / ghi ---
+    def get_or_build(
+        self, key: str, scope: str, build: Callable[[], Optional[bytes]]
+    ) -> Optional[CachedPayload]:
+        """Trả về payload trong cache, nếu chưa có thì gọi `build()` (None = không tồn tại)."""
+        version = self.version(scope)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+
+        if self.backend is not None:
+            body = self.backend.get(f"{key}:v{version}")
+            if body is not None:
+                entry = CachedPayload(body=body, version=version)
+                self._store(key, entry)
+                with self._lock:
+                    self._stats["shared_hits"] += 1
+                return entry
+
+        with self._lock:
+            self._stats["misses"] += 1
+
+        body = build()
+        if body is None:
+            return None
+
+        entry = CachedPayload(body=body, version=version)
+        self._store(key, entry)
+        if self.backend is not None:
+            self.backend.set(f"{key}:v{version}", body, self.shared_ttl)
+        return entry
+
+    def encoded_body(self, entry: CachedPayload, encoding: str, encode: Callable[[bytes], bytes]) -> bytes:
+        """
+        Body của entry đã nén theo `encoding`, nén 1 lần rồi giữ cùng entry
+        (entry hết hạn theo version thì bản nén cũng hết theo).
+        Bản nén chỉ nằm trong RAM của worker, backend dùng chung chỉ lưu body gốc.
+        Lúc cả lớp mở đề cùng lúc chỉ 1 request nén, các request khác chờ lock rồi dùng lại kết quả.
+        """
+        body = entry.encoded.get(encoding)
+        if body is not None:
+            return body
+        with entry.encode_lock:
+            body = entry.encoded.get(encoding)
+            if body is None:
+                body = encode(entry.body)
+                entry.encoded[encoding] = body
+                with self._lock:
+                    self._stats["encodes"] += 1
+        return body
+
+    def _store(self, key: str, entry: CachedPayload) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._local_versions.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), maxsize=self.maxsize)
+
+
+payload_cache = PayloadCache()
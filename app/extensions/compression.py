@@ -0,0 +1,119 @@
+import gzip
+import threading
+from typing import Dict, Optional
+
+from flask import request
+
+from app.extensions.cache import payload_cache
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn, thiếu thì chỉ nén gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/html", "text/plain"}
+
+
+class Compressor:
+    """
+    Nén response (gzip / brotli) theo Accept-Encoding của client, chỉ nén body >= COMPRESS_MIN_SIZE byte.
+
+    - Response thường: nén trong after_request với mức nén vừa phải (tốn ít CPU mỗi request).
+    - Payload trong PayloadCache: nén 1 lần với mức nén cao nhất rồi giữ cùng entry
+      (xem `cached_response`), các request sau chỉ gửi lại bytes đã nén.
+    - Response stream (export CSV / NDJSON, parse PDF) không bị nén để không phải giữ cả body.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get("COMPRESS_ENABLED", self.enabled)
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        self.gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", self.gzip_level)
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", self.brotli_quality)
+        app.after_request(self._after_request)
+        app.extensions["compressor"] = self
+
+    @property
+    def encodings(self):
+        """Các encoding hỗ trợ, theo thứ tự ưu tiên khi client chấp nhận ngang nhau."""
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self) -> Optional[str]:
+        """Encoding tốt nhất client chấp nhận (q cao nhất), None = gửi nguyên bản."""
+        if not self.enabled:
+            return None
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = request.accept_encodings.quality(encoding)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str, best: bool = False) -> bytes:
+        """best=True: mức nén cao nhất (chậm hơn), dùng cho body nén 1 lần rồi cache."""
+        if encoding == "br":
+            return brotli.compress(body, quality=11 if best else self.brotli_quality)
+        return gzip.compress(body, compresslevel=9 if best else self.gzip_level, mtime=0)
+
+    def cached_response(self, response_class, entry, mimetype: str = "application/json"):
+        """Response từ entry của PayloadCache, dùng bản nén đã cache nếu client hỗ trợ."""
+        body, encoding = entry.body, None
+        if len(body) >= self.min_size:
+            encoding = self.negotiate()
+            if encoding:
+                body = payload_cache.encoded_body(entry, encoding, lambda raw: self.compress(raw, encoding, best=True))
+
+        response = response_class(body, mimetype=mimetype)
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+            self._record(len(entry.body), len(body))
+        return response
+
+    def _after_request(self, response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        encoding = self.negotiate()
+        if not encoding:
+            return response
+
+        compressed = self.compress(body, encoding)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        self._record(len(body), len(compressed))
+        return response
+
+    def _record(self, size_in: int, size_out: int) -> None:
+        with self._lock:
+            self._stats["responses"] += 1
+            self._stats["bytes_in"] += size_in
+            self._stats["bytes_out"] += size_out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+compressor = Compressor()
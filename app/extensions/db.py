@@ -1,3 +1,68 @@
+from functools import wraps
+
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+
+REPLICA_BIND_KEY = "replica"
+# Client gửi header này (VD: ngay sau khi nộp bài) để đọc từ primary, tránh độ trễ replica
+FORCE_PRIMARY_HEADER = "X-Read-From-Primary"
+
+
+class RoutingSession(Session):
+    """
+    Session chọn engine theo request:
+
+    - View được đánh dấu @read_only: câu SELECT chạy trên replica (nếu có cấu hình
+      SQLALCHEMY_BINDS["replica"]).
+    - Ghi (flush, INSERT/UPDATE/DELETE) luôn chạy trên primary, và từ lúc đó mọi câu
+      đọc còn lại của request cũng về primary (read-after-write).
+    - Header X-Read-From-Primary hoặc use_primary() ép cả request dùng primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get("db_read_only"):
+            if self._flushing or not isinstance(clause, Select):
+                use_primary()
+            elif not g.get("db_force_primary"):
+                engine = self._db.engines.get(REPLICA_BIND_KEY)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def read_only(view):
+    """Đánh dấu view chỉ đọc: các câu SELECT trong request được phép chạy trên replica."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        if request.headers.get(FORCE_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+            use_primary()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def use_primary() -> None:
+    """Các câu truy vấn còn lại của request hiện tại chạy trên primary."""
+    g.db_force_primary = True
+
 
-db = SQLAlchemy()
+def dialect_insert(model):
+    """
+    INSERT có hỗ trợ ON CONFLICT (upsert) theo dialect đang dùng.
+    Chạy trên PostgreSQL (production) và SQLite (local/test).
+    """
+    dialect = db.session.get_bind(mapper=model).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert chưa hỗ trợ dialect: {dialect}")
+    return insert(model)
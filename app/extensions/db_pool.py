@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+POOL_MODES = ("queue", "null")
+
+
+class PoolMetrics:
+    """Thống kê thời gian chờ lấy connection từ pool (checkout) và mức độ bão hòa của pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checkouts = 0
+            self._timeouts = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += wait
+            if wait > self._wait_max:
+                self._wait_max = wait
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def stats(self, pool=None) -> Dict[str, Any]:
+        with self._lock:
+            data: Dict[str, Any] = {
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            data.update(
+                {
+                    "pool_class": type(pool).__name__,
+                    "size": pool.size(),
+                    "max_overflow": pool._max_overflow,
+                    "checked_out": checked_out,
+                    "checked_in": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                    "saturation": round(checked_out / capacity, 4) if capacity > 0 else 0.0,
+                }
+            )
+        elif pool is not None:
+            data["pool_class"] = type(pool).__name__
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool đo thời gian chờ connection (khi pool hết chỗ request phải xếp hàng ở đây)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def _env_bool(value: Optional[str], default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def build_engine_options(database_url: Optional[str], env: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS từ biến môi trường:
+
+    - DB_POOL_MODE=queue (mặc định): pool trong từng process (InstrumentedQueuePool)
+      với DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING.
+    - DB_POOL_MODE=null: NullPool, mở/đóng connection theo từng lần dùng. Dùng khi đã có
+      pooler bên ngoài ở transaction mode (Supabase pooler cổng 6543, pgbouncer) để
+      connection không bị giữ lại ở cả 2 tầng.
+    - DB_STATEMENT_TIMEOUT_MS: statement_timeout của PostgreSQL (0 = tắt). Truyền qua
+      startup option nên chỉ áp dụng ở queue mode; pooler transaction mode không chuyển
+      tiếp startup option, khi đó hãy đặt bằng `ALTER ROLE ... SET statement_timeout`.
+
+    SQLite (local/test) giữ pool mặc định của Flask-SQLAlchemy.
+    """
+    if not database_url or database_url.startswith("sqlite"):
+        return {}
+
+    mode = env.get("DB_POOL_MODE", "queue").strip().lower()
+    if mode not in POOL_MODES:
+        raise RuntimeError(f"DB_POOL_MODE không hợp lệ: {mode} (chọn 1 trong {', '.join(POOL_MODES)})")
+
+    options: Dict[str, Any] = {"pool_pre_ping": _env_bool(env.get("DB_POOL_PRE_PING"), True)}
+    if mode == "null":
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": int(env.get("DB_POOL_SIZE", "5")),
+            "max_overflow": int(env.get("DB_MAX_OVERFLOW", "10")),
+            "pool_timeout": float(env.get("DB_POOL_TIMEOUT", "30")),
+            # Pooler/NAT thường cắt connection idle lâu -> thay connection trước khi bị cắt
+            "pool_recycle": int(env.get("DB_POOL_RECYCLE", "1800")),
+        }
+    )
+
+    statement_timeout_ms = int(env.get("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if statement_timeout_ms > 0 and database_url.startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
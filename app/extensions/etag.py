@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app, request
+
+# Compressor thêm "-<encoding>" vào ETag của body đã nén (mỗi bản nén là 1 representation khác)
+ENCODING_SUFFIXES = ("", "-gzip", "-br")
+
+
+def make_etag(*parts) -> str:
+    """ETag mạnh ghép từ các mốc version (id, revision, số dòng, updated_at, ...)."""
+    return "-".join(
+        part.strftime("%Y%m%d%H%M%S%f") if isinstance(part, datetime) else str(part) for part in parts
+    )
+
+
+def not_modified(etag: str, private: bool = False):
+    """
+    Response 304 nếu If-None-Match của client khớp `etag` (hoặc bản nén của nó), ngược lại None.
+    Gọi trước khi nạp dữ liệu để request trùng lặp không tốn query nạp model / serialize.
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    matched: Optional[str] = next(
+        (etag + suffix for suffix in ENCODING_SUFFIXES if if_none_match.contains(etag + suffix)), None
+    )
+    if matched is None:
+        return None
+    response = current_app.response_class(status=304)
+    response.vary.add("Accept-Encoding")
+    return with_etag(response, matched, private)
+
+
+def with_etag(response, etag: str, private: bool = False):
+    """Gắn ETag (thêm hậu tố encoding nếu body đã nén) và bắt client hỏi lại server trước khi dùng cache."""
+    encoding = response.headers.get("Content-Encoding")
+    if encoding and not etag.endswith(f"-{encoding}"):
+        etag = f"{etag}-{encoding}"
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    return response
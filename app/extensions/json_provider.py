@@ -0,0 +1,59 @@
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # orjson là tùy chọn, thiếu thì dùng json của stdlib
+    orjson = None
+
+
+class StdJSONProvider(DefaultJSONProvider):
+    """Provider mặc định của Flask, thêm dumps_bytes() để dùng chung interface với OrJSONProvider."""
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+
+class OrJSONProvider(StdJSONProvider):
+    """
+    Serialize bằng orjson (nhanh hơn json stdlib nhiều lần với payload lớn), ra thẳng bytes UTF-8.
+
+    Giữ output giống provider mặc định: sort key theo `sort_keys`, datetime / Decimal / UUID...
+    vẫn đi qua hàm default của Flask (datetime -> HTTP date), debug mode thì indent 2.
+    Khác biệt: ký tự không phải ASCII không bị escape (\\uXXXX), NaN -> null.
+    """
+
+    def _option(self, indent: bool = False) -> int:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=_default, option=self._option(indent))
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs.keys() - {"indent"}:
+            # Tham số riêng của json stdlib (cls, separators, ...) -> để provider gốc xử lý
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        # orjson.JSONDecodeError kế thừa ValueError nên request.get_json() vẫn trả 400 như cũ
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app) -> None:
+    """Dùng orjson nếu đã cài (JSON_PROVIDER=std để ép dùng json stdlib)."""
+    use_orjson = orjson is not None and app.config.get("JSON_PROVIDER", "auto") != "std"
+    app.json = (OrJSONProvider if use_orjson else StdJSONProvider)(app)
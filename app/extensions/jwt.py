@@ -1,19 +1,33 @@
 import os
 from datetime import datetime, timedelta, timezone
+from functools import wraps
 from typing import Dict
 
 import jwt
-from flask import current_app
+from flask import current_app, g, jsonify, request
+
+ALGORITHM = "HS256"
+DEFAULT_SECRET_KEY = "change-me-in-production"
+
+
+def init_app(app) -> None:
+    """Xác định secret key 1 lần lúc khởi động, mỗi lần ký / verify chỉ đọc lại giá trị này."""
+    secret = app.config.get("JWT_SECRET_KEY") or os.getenv("JWT_SECRET_KEY")
+    if not secret:
+        app.logger.warning("JWT_SECRET_KEY chưa được đặt, đang dùng key mặc định (không an toàn)")
+        secret = DEFAULT_SECRET_KEY
+    app.extensions["jwt_secret_key"] = secret
 
 
 def _get_secret_key() -> str:
-    # Ưu tiên config trong Flask, fallback về biến môi trường
-    secret = getattr(current_app, "config", {}).get("JWT_SECRET_KEY") if current_app else None
-    return secret or os.getenv("JWT_SECRET_KEY", "change-me-in-production")
+    return current_app.extensions["jwt_secret_key"]
 
 
 def encode_access_token(payload: Dict, expires_minutes: int = 60) -> str:
     to_encode = payload.copy()
+    # PyJWT >= 2.10 bắt buộc "sub" là chuỗi khi verify
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
     now = datetime.now(timezone.utc)
     to_encode.update(
         {
@@ -22,5 +36,41 @@ def encode_access_token(payload: Dict, expires_minutes: int = 60) -> str:
         }
     )
     secret_key = _get_secret_key()
-    return jwt.encode(to_encode, secret_key, algorithm="HS256")
+    return jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
+
+
+def decode_access_token(token: str) -> Dict:
+    """Verify chữ ký + hạn dùng, token không hợp lệ -> jwt.InvalidTokenError."""
+    return jwt.decode(token, _get_secret_key(), algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
+
+
+def auth_required(*roles: str):
+    """
+    Verify header `Authorization: Bearer <token>` 1 lần cho mỗi request và gán
+    g.user_id / g.username / g.role từ token (không query bảng users).
+    Truyền roles để giới hạn vai trò, VD: @auth_required("teacher").
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return jsonify({"error": "Vui lòng đăng nhập"}), 401
+
+            try:
+                payload = decode_access_token(token.strip())
+                user_id = int(payload["sub"])
+            except (jwt.InvalidTokenError, ValueError):
+                return jsonify({"error": "Token không hợp lệ hoặc đã hết hạn"}), 401
+
+            g.user_id = user_id
+            g.username = payload.get("username")
+            g.role = payload.get("role")
+            if roles and g.role not in roles:
+                return jsonify({"error": "Bạn không có quyền thực hiện thao tác này"}), 403
+            return view(*args, **kwargs)
+
+        return wrapper
 
+    return decorator
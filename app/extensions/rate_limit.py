@@ -0,0 +1,176 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from flask import jsonify, request
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Token bucket: tối đa `capacity` lượt dồn lại, hồi `refill_per_second` lượt mỗi giây."""
+
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitRule":
+        """VD: "10/minute" -> cho phép dồn 10 lượt, hồi 10 lượt mỗi phút."""
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour)\s*", value or "")
+        if not match:
+            raise RuntimeError(f"Rate limit không hợp lệ: {value!r} (VD: 10/minute)")
+        count = int(match.group(1))
+        return cls(capacity=count, refill_per_second=count / PERIODS[match.group(2)])
+
+
+class InMemoryRateLimitBackend:
+    """Bucket trong process (mỗi gunicorn worker đếm riêng). Giới hạn số key để không phình RAM khi bị spray IP."""
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, rule: RateLimitRule, now: float) -> float:
+        """Lấy 1 token; trả về 0 nếu được phép, ngược lại số giây phải chờ."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (rule.capacity, now))
+            tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rule.refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+class RedisRateLimitBackend:
+    """Bucket dùng chung giữa các worker, cập nhật nguyên tử bằng Lua script (cần package `redis`)."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+    local retry = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry)
+    """
+
+    def __init__(self, url: str, prefix: str = "webkiemtra:rl:") -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key: str, rule: RateLimitRule, now: float) -> float:
+        return float(self._script(keys=[f"{self._prefix}{key}"], args=[rule.capacity, rule.refill_per_second, now]))
+
+
+def create_backend(url: Optional[str]):
+    if not url or url.startswith("memory://"):
+        return InMemoryRateLimitBackend()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisRateLimitBackend(url)
+    raise RuntimeError(f"RATE_LIMIT_BACKEND_URL không hỗ trợ: {url}")
+
+
+class RateLimiter:
+    """
+    Giới hạn tần suất theo IP và theo username cho các endpoint tốn kém (đăng nhập / đăng ký).
+
+    Kiểm tra chạy trong decorator, trước khi view đụng tới DB hay băm mật khẩu;
+    vượt giới hạn -> 429 kèm header Retry-After.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.trust_proxy = False
+        self.backend = InMemoryRateLimitBackend()
+        self.rules: Dict[str, RateLimitRule] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"allowed": 0, "limited_ip": 0, "limited_username": 0}
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", self.enabled)
+        self.trust_proxy = app.config.get("RATE_LIMIT_TRUST_PROXY", self.trust_proxy)
+        self.backend = create_backend(app.config.get("RATE_LIMIT_BACKEND_URL"))
+        self.rules = {name: RateLimitRule.parse(value) for name, value in app.config.get("RATE_LIMITS", {}).items()}
+        app.extensions["rate_limiter"] = self
+
+    def _client_ip(self) -> str:
+        if self.trust_proxy:
+            forwarded = request.headers.get("X-Forwarded-For", "")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.remote_addr or "unknown"
+
+    def _take(self, rule_name: str, key: str) -> float:
+        rule = self.rules.get(rule_name)
+        if rule is None:
+            return 0.0
+        return self.backend.take(f"{rule_name}:{key}", rule, time.time())
+
+    def limit(self, scope: str, username_field: Optional[str] = None):
+        """
+        Áp dụng rule "<scope>_ip" theo IP và (nếu có username_field) rule "<scope>_username"
+        theo username trong JSON body.
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                retry_after = self._take(f"{scope}_ip", self._client_ip())
+                limited = "limited_ip" if retry_after else None
+
+                if not limited and username_field:
+                    data = request.get_json(silent=True) or {}
+                    username = str(data.get(username_field) or "").strip().lower()
+                    if username:
+                        retry_after = self._take(f"{scope}_username", username)
+                        limited = "limited_username" if retry_after else None
+
+                with self._lock:
+                    self._stats[limited or "allowed"] += 1
+
+                if limited:
+                    return (
+                        jsonify({"error": "Bạn thao tác quá nhanh, vui lòng thử lại sau"}),
+                        429,
+                        {"Retry-After": str(max(1, math.ceil(retry_after)))},
+                    )
+                return view(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+rate_limiter = RateLimiter()
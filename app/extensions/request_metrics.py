@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_request_logger = logging.getLogger("webkiemtra.slow_request")
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # Không cộng dồn, cộng dồn lúc xuất
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class RouteStats:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.latency = Histogram(buckets)
+        self.statuses: Dict[int, int] = defaultdict(int)
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+
+class RequestMetrics:
+    """
+    Đo mỗi request theo (method, route): histogram thời gian xử lý, số request theo status,
+    số câu SQL và tổng thời gian DB (qua event before/after_cursor_execute của mọi Engine,
+    gồm cả replica). Request chậm hơn SLOW_REQUEST_MS ghi 1 dòng log JSON.
+
+    Số liệu nằm trong RAM của từng process (mỗi gunicorn worker 1 bộ), thời gian đo tới lúc
+    tạo xong response nên response stream chỉ tính phần trước khi bắt đầu gửi body.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.slow_request_seconds = 1.0
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._engine_events_installed = False
+
+    def init_app(self, app) -> None:
+        self.slow_request_seconds = app.config.get("SLOW_REQUEST_MS", 1000) / 1000.0
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        self._install_engine_events()
+        app.extensions["request_metrics"] = self
+
+    # --- SQL ---
+    def _install_engine_events(self) -> None:
+        if self._engine_events_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engine_events_installed = True
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Gắn mốc thời gian vào execution context của từng câu lệnh (câu lỗi thì bỏ theo context)
+        if context is not None:
+            context.request_metrics_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "request_metrics_start", None)
+        if started is not None and has_request_context() and "request_metrics_start" in g:
+            g.request_metrics_sql_statements += 1
+            g.request_metrics_sql_seconds += time.perf_counter() - started
+
+    # --- Request ---
+    @staticmethod
+    def _before_request():
+        g.request_metrics_start = time.perf_counter()
+        g.request_metrics_sql_statements = 0
+        g.request_metrics_sql_seconds = 0.0
+
+    def _after_request(self, response):
+        started = g.pop("request_metrics_start", None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        sql_statements = g.request_metrics_sql_statements
+        sql_seconds = g.request_metrics_sql_seconds
+
+        with self._lock:
+            stats = self._routes.get((request.method, route))
+            if stats is None:
+                stats = self._routes[(request.method, route)] = RouteStats(self.buckets)
+            stats.latency.observe(duration)
+            stats.statuses[response.status_code] += 1
+            stats.sql_statements += sql_statements
+            stats.sql_seconds += sql_seconds
+
+        if duration >= self.slow_request_seconds:
+            slow_request_logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_request",
+                        "method": request.method,
+                        "route": route,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "duration_ms": round(duration * 1000, 1),
+                        "sql_statements": sql_statements,
+                        "sql_ms": round(sql_seconds * 1000, 1),
+                        "user_id": g.get("user_id"),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        return response
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    # --- Prometheus text format ---
+    def render_prometheus(self, extra: Optional[Mapping[str, Mapping]] = None) -> str:
+        """
+        Xuất số liệu theo Prometheus text format (version 0.0.4).
+        `extra`: {"tên_nhóm": stats_dict}, các giá trị số được xuất dạng gauge "webkiemtra_<nhóm>_<key>".
+        """
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines: List[str] = [
+                "# HELP http_requests_total Số request đã xử lý theo route và status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds Thời gian xử lý request.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), stats in routes:
+                cumulative = 0
+                for bound, count in zip(stats.latency.buckets, stats.latency.counts):
+                    cumulative += count
+                    labels = _labels(method=method, route=route, le=_float(bound))
+                    lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+                labels = _labels(method=method, route=route)
+                lines += [
+                    f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le='+Inf')} "
+                    f"{stats.latency.count}",
+                    f"http_request_duration_seconds_sum{labels} {_float(stats.latency.sum)}",
+                    f"http_request_duration_seconds_count{labels} {stats.latency.count}",
+                ]
+
+            lines += [
+                "# HELP http_request_sql_statements_total Số câu SQL đã chạy trong các request.",
+                "# TYPE http_request_sql_statements_total counter",
+            ]
+            lines += [
+                f"http_request_sql_statements_total{_labels(method=method, route=route)} {stats.sql_statements}"
+                for (method, route), stats in routes
+            ]
+            lines += [
+                "# HELP http_request_sql_seconds_total Tổng thời gian chờ DB trong các request.",
+                "# TYPE http_request_sql_seconds_total counter",
+            ]
+            lines += [
+                f"http_request_sql_seconds_total{_labels(method=method, route=route)} {_float(stats.sql_seconds)}"
+                for (method, route), stats in routes
+            ]
+
+        for group, values in (extra or {}).items():
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"webkiemtra_{group}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {_float(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+def _float(value: float) -> str:
+    return repr(float(value))
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+request_metrics = RequestMetrics()
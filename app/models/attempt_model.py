@@ -3,6 +3,21 @@ from datetime import datetime
 
 class ExamAttempt(db.Model):
     __tablename__ = 'exam_attempts'
+    # Mỗi học sinh chỉ có tối đa 1 lượt làm bài đang mở (chưa nộp) cho mỗi đề
+    __table_args__ = (
+        db.Index(
+            'uq_exam_attempts_open',
+            'exam_id',
+            'user_id',
+            unique=True,
+            postgresql_where=db.text('end_time IS NULL'),
+            sqlite_where=db.text('end_time IS NULL'),
+        ),
+        # Tìm attempt của học sinh trong 1 đề / danh sách bài làm của 1 đề
+        db.Index('ix_exam_attempts_exam_id_user_id_end_time', 'exam_id', 'user_id', 'end_time'),
+        # "Bài thi của tôi": WHERE user_id = ? ORDER BY start_time DESC
+        db.Index('ix_exam_attempts_user_id_start_time', 'user_id', 'start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     exam_id = db.Column(db.Integer, db.ForeignKey('exams.id', ondelete='CASCADE'), nullable=False)
@@ -10,6 +25,8 @@ class ExamAttempt(db.Model):
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime)
     total_score = db.Column(db.Float)
+    # Lần cuối bài làm / câu trả lời thay đổi (nộp, chấm, autosave), dùng làm ETag
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Dòng này giúp bạn dùng được lệnh: a.exam.title
     exam = db.relationship('Exam', backref='attempts', lazy=True) 
@@ -22,10 +39,14 @@ class ExamAttempt(db.Model):
 
 class Answer(db.Model):
     __tablename__ = 'answers'
+    # Mỗi bài làm chỉ có 1 câu trả lời cho mỗi câu hỏi (autosave upsert theo cặp này)
+    __table_args__ = (
+        db.Index('uq_answers_attempt_question', 'attempt_id', 'question_id', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     attempt_id = db.Column(db.Integer, db.ForeignKey('exam_attempts.id', ondelete='CASCADE'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     
     # Nếu là trắc nghiệm thì lưu option_id
     selected_option_id = db.Column(db.Integer, db.ForeignKey('options.id', ondelete='SET NULL'), nullable=True)
@@ -0,0 +1,29 @@
+from app.extensions.db import db
+
+# Thống kê theo đề được cập nhật cộng dồn (delta) mỗi khi nộp bài / chấm / chấm lại,
+# nên đọc thống kê không phải quét toàn bộ attempts + answers.
+# Chỉ tính các bài đã nộp (end_time IS NOT NULL). Lệch số liệu -> `flask rebuild-exam-stats`.
+
+class ExamStats(db.Model):
+    __tablename__ = 'exam_stats'
+
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id', ondelete='CASCADE'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0.0) # Để tính độ lệch chuẩn
+
+class ExamScoreBucket(db.Model):
+    __tablename__ = 'exam_score_buckets'
+
+    # Phổ điểm: bucket = phần nguyên của tổng điểm
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id', ondelete='CASCADE'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class QuestionStats(db.Model):
+    __tablename__ = 'question_stats'
+
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id', ondelete='CASCADE'), nullable=False, index=True)
+    correct_count = db.Column(db.Integer, nullable=False, default=0) # Số bài được điểm > 0 ở câu này
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
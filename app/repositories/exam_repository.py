@@ -1,8 +1,295 @@
 # backend/app/repositories/exam_repository.py
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.attempt_model import Answer, ExamAttempt
 from app.models.exam_model import Exam, Question, Option
-from app.extensions.db import db
+from app.models.user_model import User
+from app.extensions.db import db, dialect_insert
 
 class ExamRepository:
+    # --- Read model: nạp cả cây đề thi (exam -> questions -> options) ---
+    # Dùng selectinload để số query cố định (1 exam + 1 questions + 1 options)
+    # thay vì lazy load từng câu hỏi (N+1).
+    def get_exam_tree(self, exam_id: int) -> Optional[Exam]:
+        return (
+            Exam.query.options(selectinload(Exam.questions).selectinload(Question.options))
+            .filter_by(id=exam_id)
+            .first()
+        )
+
+    # --- Mốc version cho ETag: 1 query nhỏ, không nạp model ---
+    def get_exam_version(self, exam_id: int):
+        """Row (created_by, revision) của đề, None nếu không tồn tại."""
+        return db.session.execute(select(Exam.created_by, Exam.revision).where(Exam.id == exam_id)).first()
+
+    def bump_exam_revision(self, exam_id: int) -> None:
+        """Đánh dấu nội dung đề đã đổi (ETag cũ hết hiệu lực). Không commit."""
+        db.session.execute(update(Exam).where(Exam.id == exam_id).values(revision=Exam.revision + 1))
+
+    def exams_version(self) -> Tuple[int, Optional[int]]:
+        """(số đề, id lớn nhất): đổi khi tạo / xóa đề (danh sách đề không có thao tác sửa)."""
+        return tuple(db.session.execute(select(func.count(Exam.id), func.max(Exam.id))).one())
+
+    def exam_attempts_version(self, exam_id: int) -> Tuple[int, Optional[datetime]]:
+        """(số bài làm, updated_at mới nhất) của 1 đề."""
+        return self._attempts_version(ExamAttempt.exam_id == exam_id)
+
+    def user_attempts_version(self, user_id: int) -> Tuple[int, Optional[datetime]]:
+        """(số bài làm, updated_at mới nhất) của 1 học sinh."""
+        return self._attempts_version(ExamAttempt.user_id == user_id)
+
+    def _attempts_version(self, criterion) -> Tuple[int, Optional[datetime]]:
+        stmt = select(func.count(ExamAttempt.id), func.max(ExamAttempt.updated_at)).where(criterion)
+        return tuple(db.session.execute(stmt).one())
+
+    def get_attempt_with_exam_tree(self, attempt_id: int) -> Optional[ExamAttempt]:
+        """Bài làm + đề thi đầy đủ + các câu trả lời, tổng cộng 4 query."""
+        return (
+            ExamAttempt.query.options(
+                joinedload(ExamAttempt.exam)
+                .selectinload(Exam.questions)
+                .selectinload(Question.options),
+                selectinload(ExamAttempt.answers),
+            )
+            .filter_by(id=attempt_id)
+            .first()
+        )
+
+    # --- Query gốc của các danh sách (controller phân trang keyset, `flask check-indexes` EXPLAIN) ---
+    def exams_query(self, created_by: Optional[int] = None):
+        query = Exam.query
+        if created_by is not None:
+            query = query.filter_by(created_by=created_by)
+        return query
+
+    def user_attempts_query(self, user_id: int):
+        """Bài làm của 1 user, kèm đề (trang "Bài thi của tôi")."""
+        return ExamAttempt.query.filter_by(user_id=user_id).options(joinedload(ExamAttempt.exam))
+
+    def exam_attempts_query(self, exam_id: int):
+        """Bài làm của 1 đề, kèm học sinh và câu trả lời."""
+        return ExamAttempt.query.filter_by(exam_id=exam_id).options(
+            joinedload(ExamAttempt.student), selectinload(ExamAttempt.answers)
+        )
+
+    def get_answer(self, attempt_id: int, question_id: int) -> Optional[Answer]:
+        return Answer.query.filter_by(attempt_id=attempt_id, question_id=question_id).first()
+
+    def start_or_resume_attempt(self, exam_id: int, user_id: int) -> Optional[Tuple[int, bool]]:
+        """
+        Tạo lượt làm bài mới hoặc trả về lượt đang mở, trong 1 câu lệnh:
+
+            INSERT ... SELECT ... WHERE EXISTS (exam)
+            ON CONFLICT (exam_id, user_id) WHERE end_time IS NULL DO UPDATE (no-op)
+            RETURNING id, start_time
+
+        Dựa vào partial unique index uq_exam_attempts_open nên nhiều request
+        "Bắt đầu" cùng lúc cũng chỉ tạo đúng 1 attempt. Không commit.
+        Trả về (attempt_id, created) hoặc None nếu đề không tồn tại.
+        """
+        now = datetime.utcnow()
+        source = select(
+            literal(exam_id, type_=ExamAttempt.exam_id.type),
+            literal(user_id, type_=ExamAttempt.user_id.type),
+            literal(now, type_=ExamAttempt.start_time.type),
+        ).where(exists().where(Exam.id == exam_id))
+
+        stmt = dialect_insert(ExamAttempt).from_select(["exam_id", "user_id", "start_time"], source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExamAttempt.exam_id, ExamAttempt.user_id],
+            index_where=ExamAttempt.end_time.is_(None),
+            # Gán lại chính nó để RETURNING trả về cả dòng đã tồn tại
+            set_={"start_time": ExamAttempt.start_time},
+        ).returning(ExamAttempt.id, ExamAttempt.start_time)
+
+        row = db.session.execute(stmt).first()
+        if row is None:
+            return None
+        # Dòng mới tạo có start_time đúng bằng `now` của request này
+        return row.id, row.start_time == now
+
+    def lock_open_attempt(self, attempt_id: int) -> bool:
+        """
+        Khóa dòng attempt nếu bài còn đang làm, bằng 1 UPDATE có điều kiện (WHERE end_time IS NULL)
+        gán lại chính updated_at (không đổi dữ liệu, ETag giữ nguyên). Không commit.
+
+        Autosave chạy song song với nộp bài thì 1 trong 2 chờ lock dòng của bên kia: autosave
+        sau close_attempt cập nhật 0 dòng -> trả về False, không ghi câu trả lời vào bài đã chấm.
+        """
+        stmt = (
+            update(ExamAttempt)
+            .where(ExamAttempt.id == attempt_id, ExamAttempt.end_time.is_(None))
+            .values(updated_at=ExamAttempt.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.execute(stmt).rowcount == 1
+
+    def close_attempt(self, attempt_id: int, end_time: datetime) -> bool:
+        """
+        Đánh dấu bài làm đã nộp bằng 1 UPDATE có điều kiện (WHERE end_time IS NULL). Không commit.
+
+        Nhiều request nộp cùng 1 bài chạy song song (double-click / client retry) thì request sau
+        chờ lock dòng tới khi request đầu commit rồi cập nhật 0 dòng -> chỉ 1 request được chấm.
+        """
+        stmt = (
+            update(ExamAttempt)
+            .where(ExamAttempt.id == attempt_id, ExamAttempt.end_time.is_(None))
+            .values(end_time=end_time)
+            .execution_options(synchronize_session=False)
+        )
+        return db.session.execute(stmt).rowcount == 1
+
+    def load_answer_key_rows(self, exam_id: int):
+        """1 query: (question_id, question_type, score, option_id, is_correct) cho cả đề."""
+        stmt = (
+            select(Question.id, Question.question_type, Question.score, Option.id, Option.is_correct)
+            .outerjoin(Option, Option.question_id == Question.id)
+            .where(Question.exam_id == exam_id)
+            .order_by(Question.id, Option.id)
+        )
+        return db.session.execute(stmt).all()
+
+    def load_response_rows(self, exam_id: int) -> List[Tuple[int, int, Optional[int], Optional[float]]]:
+        """
+        1 query: (attempt_id, question_id, selected_option_id, score) của mọi bài đã nộp.
+
+        Đọc thẳng tuple từ cursor DBAPI, không qua Row của SQLAlchemy: có thể tới hàng trăm
+        nghìn dòng và toàn cột số nên không cần xử lý kiểu (nhanh hơn khoảng 2-3 lần).
+        """
+        stmt = (
+            select(Answer.attempt_id, Answer.question_id, Answer.selected_option_id, Answer.score)
+            .join(ExamAttempt, ExamAttempt.id == Answer.attempt_id)
+            .where(ExamAttempt.exam_id == exam_id, ExamAttempt.end_time.is_not(None))
+        )
+        # bind_arguments để RoutingSession vẫn chọn được replica cho câu SELECT này
+        connection = db.session.connection(bind_arguments={"clause": stmt})
+        return connection.execute(stmt).cursor.fetchall()
+
+    def upsert_answers(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Ghi nhiều câu trả lời bằng 1 lệnh INSERT ... ON CONFLICT (attempt_id, question_id).
+        Dòng không đổi thì bỏ qua (không tốn write). Không commit.
+        """
+        if not rows:
+            return 0
+        stmt = dialect_insert(Answer).values(rows)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Answer.attempt_id, Answer.question_id],
+            set_={
+                "selected_option_id": excluded.selected_option_id,
+                "essay_answer": excluded.essay_answer,
+            },
+            where=or_(
+                Answer.selected_option_id.is_distinct_from(excluded.selected_option_id),
+                Answer.essay_answer.is_distinct_from(excluded.essay_answer),
+            ),
+        )
+        return db.session.execute(stmt).rowcount
+
+    def get_attempt_answer_choices(self, attempt_id: int):
+        """(id, question_id, selected_option_id) của các câu trả lời đã lưu."""
+        stmt = select(Answer.id, Answer.question_id, Answer.selected_option_id).where(
+            Answer.attempt_id == attempt_id
+        )
+        return db.session.execute(stmt).all()
+
+    def bulk_update_answer_scores(self, updates: List[Dict[str, Any]]) -> None:
+        """Cập nhật điểm theo primary key bằng 1 lệnh UPDATE executemany. Không commit."""
+        if updates:
+            db.session.execute(update(Answer), updates)
+
+    def regrade_question(
+        self, exam_id: int, question_id: int, correct_option_id: int, question_score: float
+    ) -> Dict[str, int]:
+        """
+        Đổi đáp án đúng của 1 câu trắc nghiệm và chấm lại mọi bài làm bằng 3 câu UPDATE
+        (chạy được trên cả PostgreSQL và SQLite). Không commit.
+        Trả về số dòng thực sự thay đổi.
+        """
+        sync = {"synchronize_session": False}
+
+        # 1. Chỉ option được chọn là đúng
+        db.session.execute(
+            update(Option)
+            .where(Option.question_id == question_id)
+            .values(is_correct=case((Option.id == correct_option_id, True), else_=False)),
+            execution_options=sync,
+        )
+
+        # 2. Chấm lại điểm từng câu trả lời (bỏ qua dòng không đổi)
+        new_score = case((Answer.selected_option_id == correct_option_id, question_score), else_=0.0)
+        answers_updated = db.session.execute(
+            update(Answer)
+            .where(Answer.question_id == question_id, Answer.score.is_distinct_from(new_score))
+            .values(score=new_score),
+            execution_options=sync,
+        ).rowcount
+
+        # 3. Tính lại tổng điểm từ aggregate cho các bài đã nộp có trả lời câu này (bài đang làm
+        #    chưa có tổng điểm, được chấm lúc nộp; cùng tập bài với submitted_totals_for_question)
+        total = (
+            select(func.coalesce(func.sum(Answer.score), 0.0))
+            .where(Answer.attempt_id == ExamAttempt.id)
+            .scalar_subquery()
+        )
+        attempts_updated = db.session.execute(
+            update(ExamAttempt)
+            .where(
+                ExamAttempt.exam_id == exam_id,
+                ExamAttempt.end_time.is_not(None),
+                ExamAttempt.id.in_(select(Answer.attempt_id).where(Answer.question_id == question_id)),
+                ExamAttempt.total_score.is_distinct_from(total),
+            )
+            .values(total_score=total),
+            execution_options=sync,
+        ).rowcount
+
+        return {"answers_updated": answers_updated, "attempts_updated": attempts_updated}
+
+    RESULT_EXPORT_COLUMNS = (
+        "attempt_id",
+        "student_id",
+        "student_name",
+        "total_score",
+        "start_time",
+        "end_time",
+        "question_id",
+        "selected_option_id",
+        "essay_answer",
+        "score",
+    )
+
+    def iter_exam_results(self, exam_id: int, batch_size: int = 1000) -> Iterator[Any]:
+        """
+        Kết quả thi dạng phẳng (1 dòng / câu trả lời), đọc bằng server-side cursor
+        theo từng batch `yield_per` nên bộ nhớ không tăng theo số bài làm.
+        """
+        stmt = (
+            select(
+                ExamAttempt.id.label("attempt_id"),
+                ExamAttempt.user_id.label("student_id"),
+                User.username.label("student_name"),
+                ExamAttempt.total_score,
+                ExamAttempt.start_time,
+                ExamAttempt.end_time,
+                Answer.question_id,
+                Answer.selected_option_id,
+                Answer.essay_answer,
+                Answer.score,
+            )
+            .outerjoin(User, User.id == ExamAttempt.user_id)
+            .outerjoin(Answer, Answer.attempt_id == ExamAttempt.id)
+            .where(ExamAttempt.exam_id == exam_id)
+            .order_by(ExamAttempt.id, Answer.question_id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.session.execute(stmt)
+
     def create_full_exam(self, data, created_by=None):
         try:
             # 1. Tạo Exam
@@ -15,30 +302,80 @@ class ExamRepository:
             db.session.add(new_exam)
             db.session.flush() # Để lấy ID của exam vừa tạo
 
-            # 2. Duyệt qua danh sách câu hỏi
-            for q_data in data.get('questions', []):
-                new_question = Question(
-                    exam_id=new_exam.id,
-                    content=q_data['content'],
-                    question_type=q_data.get('question_type', 'mcq'),
-                    score=float(q_data.get('score', 1.0))
-                )
-                db.session.add(new_question)
-                db.session.flush() # Để lấy ID của question vừa tạo
-
-                # 3. Duyệt qua danh sách đáp án (nếu là trắc nghiệm)
-                if new_question.question_type == 'mcq':
-                    for opt_data in q_data.get('options', []):
-                        new_option = Option(
-                            question_id=new_question.id,
-                            content=opt_data['content'],
-                            is_correct=opt_data.get('is_correct', False)
-                        )
-                        db.session.add(new_option)
-
-            # 4. Lưu tất cả vào DB
+            # 2. Câu hỏi + đáp án: insert nhiều dòng 1 lần, không flush từng câu
+            self._bulk_insert_questions([(new_exam.id, data)])
+
+            # 3. Lưu tất cả vào DB
             db.session.commit()
             return new_exam
         except Exception as e:
             db.session.rollback() # Nếu lỗi thì hủy hết, không lưu dở dang
-            raise e
\ No newline at end of file
+            raise e
+
+    def create_many_exams(self, exams_data: List[Dict[str, Any]], created_by=None) -> List[int]:
+        """Import nhiều đề trong 1 transaction (3 câu INSERT cho tất cả), trả về danh sách exam_id."""
+        try:
+            exam_ids = self._insert_returning_ids(
+                Exam,
+                [
+                    {
+                        "title": data['title'],
+                        "description": data.get('description', ''),
+                        "duration": int(data['duration']),
+                        "created_by": created_by,
+                    }
+                    for data in exams_data
+                ],
+            )
+            self._bulk_insert_questions(list(zip(exam_ids, exams_data)))
+            db.session.commit()
+            return exam_ids
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def _bulk_insert_questions(self, exams: List[Tuple[int, Dict[str, Any]]]) -> None:
+        question_rows = []
+        question_options = []
+        for exam_id, data in exams:
+            for q_data in data.get('questions', []):
+                question_type = q_data.get('question_type', 'mcq')
+                question_rows.append(
+                    {
+                        "exam_id": exam_id,
+                        "content": q_data['content'],
+                        "question_type": question_type,
+                        "score": float(q_data.get('score', 1.0)),
+                    }
+                )
+                # Chỉ câu trắc nghiệm mới có đáp án
+                question_options.append(q_data.get('options', []) if question_type == 'mcq' else [])
+
+        question_ids = self._insert_returning_ids(Question, question_rows)
+
+        option_rows = [
+            {
+                "question_id": question_id,
+                "content": opt_data['content'],
+                "is_correct": opt_data.get('is_correct', False),
+            }
+            for question_id, options in zip(question_ids, question_options)
+            for opt_data in options
+        ]
+        if option_rows:
+            db.session.execute(insert(Option), option_rows)
+
+    def _insert_returning_ids(self, model, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        INSERT nhiều dòng và lấy id theo đúng thứ tự `rows`.
+
+        PostgreSQL (và SQLite >= 3.35): INSERT ... VALUES (...), (...) RETURNING id theo lô.
+        DB không hỗ trợ RETURNING nhiều dòng có thứ tự -> fallback insert từng dòng.
+        """
+        if not rows:
+            return []
+        dialect = db.session.get_bind(mapper=model).dialect
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+            return list(db.session.scalars(stmt, rows))
+        return [db.session.execute(insert(model).values(**row)).inserted_primary_key[0] for row in rows]
@@ -0,0 +1,64 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat() if sort_value is not None else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Giải mã cursor, cursor không hợp lệ -> ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (datetime.fromisoformat(sort_raw) if sort_raw is not None else None), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError("cursor không hợp lệ") from e
+
+
+def keyset_paginate(query, sort_column, id_column, limit: int, cursor: Optional[str] = None) -> Page:
+    """
+    Phân trang keyset theo (sort_column DESC NULLS FIRST, id DESC).
+
+    Thay vì OFFSET (càng về sau càng chậm), trang tiếp theo lọc các dòng "nhỏ hơn"
+    dòng cuối của trang trước nên luôn dùng được index (sort_column, id).
+    Dòng cũ có thể có sort_column NULL (cột nullable): xếp đầu, đúng thứ tự index DESC của
+    PostgreSQL, và cursor ghi NULL (dòng cuối trang thuộc nhóm NULL) một cách tường minh.
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort_value is None:
+            # Phần còn lại của nhóm NULL, rồi tới mọi dòng có giá trị
+            query = query.filter(or_(and_(sort_column.is_(None), id_column < last_id), sort_column.is_not(None)))
+        else:
+            # So sánh với NULL không bao giờ đúng nên nhóm NULL (đã qua) tự bị loại
+            query = query.filter(
+                or_(
+                    sort_column < sort_value,
+                    and_(sort_column == sort_value, id_column < last_id),
+                )
+            )
+
+    rows = query.order_by(sort_column.desc().nulls_first(), id_column.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return Page(items=items, next_cursor=next_cursor)
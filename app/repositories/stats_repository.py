@@ -0,0 +1,230 @@
+# backend/app/repositories/stats_repository.py
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, delete, func, insert, select
+
+from app.extensions.db import db, dialect_insert
+from app.models.attempt_model import Answer, ExamAttempt
+from app.models.exam_model import Question
+from app.models.stats_model import ExamScoreBucket, ExamStats, QuestionStats
+
+# (tổng điểm cũ, tổng điểm mới) của 1 bài; None = bài chưa được tính (chưa nộp)
+ScoreChange = Tuple[Optional[float], Optional[float]]
+
+
+def score_bucket(score: Optional[float]) -> int:
+    return int(score or 0.0)
+
+
+class ExamStatsRepository:
+    """
+    Thống kê theo đề, cập nhật bằng các câu upsert cộng dồn
+    (INSERT ... ON CONFLICT DO UPDATE SET col = col + delta) nên nhiều request
+    cùng cập nhật 1 đề không ghi đè lên nhau. Các hàm ghi không commit.
+    """
+
+    # --- Cập nhật cộng dồn ---
+    def apply_score_changes(self, exam_id: int, changes: Iterable[ScoreChange]) -> None:
+        count_delta = 0
+        sum_delta = 0.0
+        sq_delta = 0.0
+        buckets: Counter = Counter()
+        for old, new in changes:
+            if old is not None:
+                count_delta -= 1
+                sum_delta -= old
+                sq_delta -= old * old
+                buckets[score_bucket(old)] -= 1
+            if new is not None:
+                count_delta += 1
+                sum_delta += new
+                sq_delta += new * new
+                buckets[score_bucket(new)] += 1
+
+        if count_delta or sum_delta or sq_delta:
+            stmt = dialect_insert(ExamStats).values(
+                exam_id=exam_id, attempt_count=count_delta, score_sum=sum_delta, score_sq_sum=sq_delta
+            )
+            excluded = stmt.excluded
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ExamStats.exam_id],
+                    set_={
+                        "attempt_count": ExamStats.attempt_count + excluded.attempt_count,
+                        "score_sum": ExamStats.score_sum + excluded.score_sum,
+                        "score_sq_sum": ExamStats.score_sq_sum + excluded.score_sq_sum,
+                    },
+                )
+            )
+
+        rows = [{"exam_id": exam_id, "bucket": b, "count": c} for b, c in sorted(buckets.items()) if c]
+        if rows:
+            stmt = dialect_insert(ExamScoreBucket).values(rows)
+            db.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ExamScoreBucket.exam_id, ExamScoreBucket.bucket],
+                    set_={"count": ExamScoreBucket.count + stmt.excluded.count},
+                )
+            )
+
+    def apply_question_deltas(self, exam_id: int, deltas: Dict[int, Tuple[int, float]]) -> None:
+        """deltas: question_id -> (thay đổi số bài đúng, thay đổi tổng điểm)."""
+        rows = [
+            {"question_id": question_id, "exam_id": exam_id, "correct_count": correct, "score_sum": score}
+            for question_id, (correct, score) in sorted(deltas.items())
+            if correct or score
+        ]
+        if not rows:
+            return
+        stmt = dialect_insert(QuestionStats).values(rows)
+        excluded = stmt.excluded
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[QuestionStats.question_id],
+                set_={
+                    "correct_count": QuestionStats.correct_count + excluded.correct_count,
+                    "score_sum": QuestionStats.score_sum + excluded.score_sum,
+                },
+            )
+        )
+
+    def record_submission(self, exam_id: int, total_score: float, answer_scores: Iterable[Tuple[int, float]]) -> None:
+        """Bài vừa nộp: answer_scores = các cặp (question_id, điểm câu đó)."""
+        self.apply_score_changes(exam_id, [(None, total_score)])
+        self.apply_question_deltas(
+            exam_id,
+            {question_id: (1 if score > 0 else 0, score) for question_id, score in answer_scores},
+        )
+
+    def record_answer_regrade(
+        self, exam_id: int, question_id: int, old_score: float, new_score: float, old_total: float, new_total: float
+    ) -> None:
+        """Chấm lại 1 câu của 1 bài đã nộp (VD: chấm tự luận)."""
+        self.apply_score_changes(exam_id, [(old_total, new_total)])
+        correct_delta = (1 if new_score > 0 else 0) - (1 if old_score > 0 else 0)
+        self.apply_question_deltas(exam_id, {question_id: (correct_delta, new_score - old_score)})
+
+    def submitted_totals_for_question(self, exam_id: int, question_id: int) -> Dict[int, float]:
+        """attempt_id -> tổng điểm của các bài đã nộp có trả lời câu `question_id`."""
+        stmt = select(ExamAttempt.id, func.coalesce(ExamAttempt.total_score, 0.0)).where(
+            ExamAttempt.exam_id == exam_id,
+            ExamAttempt.end_time.is_not(None),
+            ExamAttempt.id.in_(select(Answer.attempt_id).where(Answer.question_id == question_id)),
+        )
+        return dict(db.session.execute(stmt).all())
+
+    def refresh_question(self, exam_id: int, question_id: int) -> None:
+        """Tính lại thống kê 1 câu từ các câu trả lời của câu đó (dùng index answers.question_id)."""
+        correct, score_sum = db.session.execute(
+            select(
+                func.coalesce(func.sum(case((Answer.score > 0, 1), else_=0)), 0),
+                func.coalesce(func.sum(Answer.score), 0.0),
+            )
+            .join(ExamAttempt, ExamAttempt.id == Answer.attempt_id)
+            .where(Answer.question_id == question_id, ExamAttempt.end_time.is_not(None))
+        ).one()
+
+        stmt = dialect_insert(QuestionStats).values(
+            question_id=question_id, exam_id=exam_id, correct_count=correct, score_sum=score_sum
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[QuestionStats.question_id],
+                set_={"correct_count": stmt.excluded.correct_count, "score_sum": stmt.excluded.score_sum},
+            )
+        )
+
+    # --- Đọc: chỉ đọc các dòng thống kê, không quét attempts/answers ---
+    def get_exam_stats(self, exam_id: int) -> Dict[str, Any]:
+        stats = db.session.get(ExamStats, exam_id)
+        count = stats.attempt_count if stats else 0
+        score_sum = stats.score_sum if stats else 0.0
+        sq_sum = stats.score_sq_sum if stats else 0.0
+
+        average = score_sum / count if count else None
+        stddev = math.sqrt(max(sq_sum / count - average * average, 0.0)) if count else None
+
+        buckets = db.session.execute(
+            select(ExamScoreBucket.bucket, ExamScoreBucket.count)
+            .where(ExamScoreBucket.exam_id == exam_id, ExamScoreBucket.count > 0)
+            .order_by(ExamScoreBucket.bucket)
+        ).all()
+
+        questions = db.session.execute(
+            select(Question.id, Question.score, QuestionStats.correct_count, QuestionStats.score_sum)
+            .outerjoin(QuestionStats, QuestionStats.question_id == Question.id)
+            .where(Question.exam_id == exam_id)
+            .order_by(Question.id)
+        ).all()
+
+        return {
+            "exam_id": exam_id,
+            "attempt_count": count,
+            "average_score": average,
+            "stddev_score": stddev,
+            "distribution": [{"score": bucket, "count": c} for bucket, c in buckets],
+            "questions": [
+                {
+                    "question_id": question_id,
+                    "max_score": max_score,
+                    "correct_count": correct or 0,
+                    "correct_rate": (correct or 0) / count if count else None,
+                    "average_score": (q_sum or 0.0) / count if count else None,
+                }
+                for question_id, max_score, correct, q_sum in questions
+            ],
+        }
+
+    # --- Tính lại toàn bộ từ dữ liệu gốc ---
+    def rebuild(self, exam_id: Optional[int] = None) -> None:
+        """Xóa và tính lại thống kê (1 đề hoặc tất cả) bằng INSERT ... SELECT aggregate. Không commit."""
+        submitted = [ExamAttempt.end_time.is_not(None)]
+        if exam_id is not None:
+            submitted.append(ExamAttempt.exam_id == exam_id)
+
+        for model in (ExamStats, ExamScoreBucket, QuestionStats):
+            stmt = delete(model)
+            if exam_id is not None:
+                stmt = stmt.where(model.exam_id == exam_id)
+            db.session.execute(stmt, execution_options={"synchronize_session": False})
+
+        total = func.coalesce(ExamAttempt.total_score, 0.0)
+        db.session.execute(
+            insert(ExamStats).from_select(
+                ["exam_id", "attempt_count", "score_sum", "score_sq_sum"],
+                select(ExamAttempt.exam_id, func.count(), func.sum(total), func.sum(total * total))
+                .where(*submitted)
+                .group_by(ExamAttempt.exam_id),
+            )
+        )
+
+        # Phần nguyên như score_bucket(): PostgreSQL CAST làm tròn nên FLOOR trước, SQLite CAST cắt phần lẻ
+        if db.session.get_bind(mapper=ExamAttempt).dialect.name == "postgresql":
+            bucket = cast(func.floor(total), Integer)
+        else:
+            bucket = cast(total, Integer)
+        db.session.execute(
+            insert(ExamScoreBucket).from_select(
+                ["exam_id", "bucket", "count"],
+                select(ExamAttempt.exam_id, bucket, func.count())
+                .where(*submitted)
+                .group_by(ExamAttempt.exam_id, bucket),
+            )
+        )
+
+        db.session.execute(
+            insert(QuestionStats).from_select(
+                ["question_id", "exam_id", "correct_count", "score_sum"],
+                select(
+                    Answer.question_id,
+                    ExamAttempt.exam_id,
+                    func.sum(case((Answer.score > 0, 1), else_=0)),
+                    func.coalesce(func.sum(Answer.score), 0.0),
+                )
+                .join(ExamAttempt, ExamAttempt.id == Answer.attempt_id)
+                .where(*submitted)
+                .group_by(Answer.question_id, ExamAttempt.exam_id),
+            )
+        )
@@ -24,3 +24,7 @@ class UserRepository:
         db.session.commit()
         return user
 
+
+    def update_password(self, user: User, password_hash: str) -> None:
+        user.password = password_hash
+        db.session.commit()
@@ -1,102 +1,122 @@
+import logging
 import pdfplumber
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
 
 class ExamPdfParser:
-    def parse_file(self, file_stream) -> List[Dict[str, Any]]:
-        questions = []
-        
-        # Regex nhận diện bắt đầu câu hỏi: 
-        # VD: "Câu 1:", "1.", "Bài 1:", "Question 1"
-        # Giải thích: ^(từ khóa) + (số) + (dấu chấm/hai chấm/ngoặc) HOẶC (số) + (dấu chấm/hai chấm)
-        question_pattern = re.compile(r'^(Câu|Question|Bài)\s*\d+[:\.\)]|^\d+[\.\:\)]')
+    """
+    Parse đề thi từ PDF theo dạng pipeline generator:
 
-        # Regex nhận diện bắt đầu đáp án:
-        # VD: "A.", "a)", "A/","1." (nếu dùng số thay chữ)
-        option_pattern = re.compile(r'^([A-D]|[a-d]|[1-4])[\.\)\/\-]')
+        page -> các dòng text -> câu hỏi
 
-        # Các từ khóa để nhận biết dòng chứa đáp án đúng (để bỏ qua)
-        answer_keys_pattern = re.compile(r'(đáp án|lời giải|hướng dẫn|answer key|key:)', re.IGNORECASE)
+    Mỗi trang được trích xuất rồi giải phóng cache ngay (flush_cache) nên bộ nhớ
+    không tăng theo số trang, và câu hỏi được yield ngay khi gặp câu tiếp theo.
+    """
 
-        # Biến trạng thái
-        current_question = None
-        current_option = None 
+    # Tăng mỗi khi đổi logic parse để cache kết quả cũ (PdfParseCache) tự hết hiệu lực
+    VERSION = "2"
+
+    # Regex nhận diện bắt đầu câu hỏi:
+    # VD: "Câu 1:", "1.", "Bài 1:", "Question 1"
+    # Giải thích: ^(từ khóa) + (số) + (dấu chấm/hai chấm/ngoặc) HOẶC (số) + (dấu chấm/hai chấm)
+    question_pattern = re.compile(r'^(Câu|Question|Bài)\s*\d+[:\.\)]|^\d+[\.\:\)]')
+
+    # Regex nhận diện bắt đầu đáp án:
+    # VD: "A.", "a)", "A/","1." (nếu dùng số thay chữ)
+    option_pattern = re.compile(r'^([A-D]|[a-d]|[1-4])[\.\)\/\-]')
+
+    # Các từ khóa để nhận biết dòng chứa đáp án đúng (để bỏ qua)
+    answer_keys_pattern = re.compile(r'(đáp án|lời giải|hướng dẫn|answer key|key:)', re.IGNORECASE)
 
+    def parse_file(self, file_stream) -> List[Dict[str, Any]]:
         try:
-            # pdfplumber có thể đọc trực tiếp từ stream
-            with pdfplumber.open(file_stream) as pdf:
-                full_text_lines = []
-                
-                # 1. Trích xuất toàn bộ text theo từng dòng visual
-                for page in pdf.pages:
+            return self.parse_file_strict(file_stream)
+        except Exception as e:
+            logger.warning("Lỗi khi đọc PDF: %s", e)
+            return []
+
+    def parse_file_strict(self, file_stream) -> List[Dict[str, Any]]:
+        """Giống parse_file nhưng không nuốt lỗi (dùng cho job chạy nền cần biết lý do lỗi)."""
+        return list(self.iter_questions(file_stream))
+
+    def iter_questions(self, file_stream) -> Iterator[Dict[str, Any]]:
+        """Yield từng câu hỏi ngay khi đọc xong, không chờ hết file."""
+        return self.scan_lines(self.iter_lines(file_stream))
+
+    # --- 1. Trích xuất text theo từng trang ---
+    def iter_lines(self, file_stream) -> Iterator[str]:
+        # pdfplumber có thể đọc trực tiếp từ stream
+        with pdfplumber.open(file_stream) as pdf:
+            for page in pdf.pages:
+                try:
                     extracted = page.extract_text()
-                    if extracted:
-                        # Tách dòng và làm sạch khoảng trắng thừa
-                        lines = extracted.split('\n')
-                        full_text_lines.extend([line.strip() for line in lines if line.strip()])
-
-                # 2. Quét từng dòng (Scan Line Algorithm)
-                for line in full_text_lines:
-                    
-                    # Nếu gặp dòng chứa "Đáp án đúng: A" thì bỏ qua
-                    if answer_keys_pattern.search(line) and len(line) < 50:
-                        continue
-
-                    # --- CASE 1: BẮT ĐẦU CÂU HỎI MỚI ---
-                    if question_pattern.match(line):
-                        # Lưu câu hỏi cũ trước khi tạo câu mới
-                        if current_question:
-                            questions.append(current_question)
-                        
-                        # Làm sạch chữ "Câu 1:" để lấy nội dung
-                        clean_content = re.sub(question_pattern, '', line).strip()
-                        
-                        current_question = {
-                            "content": clean_content,
-                            "question_type": "mcq",
-                            "score": 1,
-                            "options": []
-                        }
-                        current_option = None # Reset option
-
-                    # --- CASE 2: BẮT ĐẦU ĐÁP ÁN (A, B, C, D) ---
-                    # Chỉ xét nếu đang nằm trong 1 câu hỏi
-                    elif current_question and option_pattern.match(line):
-                        match = option_pattern.match(line)
-                        label = match.group(1).upper() # Lấy chữ cái A, B...
-                        
-                        # Chuyển số 1-4 thành A-D nếu cần
-                        if label in ['1', '2', '3', '4']:
-                            mapping = {'1': 'A', '2': 'B', '3': 'C', '4': 'D'}
-                            label = mapping[label]
-
-                        # Lấy nội dung đáp án (bỏ chữ "A." ở đầu)
-                        clean_opt_content = re.sub(option_pattern, '', line).strip()
-
-                        new_option = {
-                            "content": clean_opt_content,
-                            "is_correct": False 
-                        }
-                        
-                        current_question["options"].append(new_option)
-                        current_option = new_option # Đánh dấu đang xử lý option này
-
-                    # --- CASE 3: NỘI DUNG NỐI TIẾP (DÒNG DÀI) ---
-                    else:
-                        if current_question:
-                            if current_option:
-                                # Nếu đang đứng ở đáp án -> Nối text vào đáp án
-                                current_option["content"] += " " + line
-                            else:
-                                # Nếu chưa có đáp án -> Nối text vào câu hỏi
-                                current_question["content"] += " " + line
-
-                # Lưu câu hỏi cuối cùng
+                finally:
+                    # Giải phóng layout/chars đã cache của trang, tránh giữ cả file trong RAM
+                    page.close()
+
+                if not extracted:
+                    continue
+                # Tách dòng và làm sạch khoảng trắng thừa
+                for line in extracted.split('\n'):
+                    line = line.strip()
+                    if line:
+                        yield line
+
+    # --- 2. Quét từng dòng (Scan Line Algorithm) ---
+    def scan_lines(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        question_pattern = self.question_pattern
+        option_pattern = self.option_pattern
+        answer_keys_pattern = self.answer_keys_pattern
+
+        # Biến trạng thái
+        current_question: Optional[Dict[str, Any]] = None
+        current_option: Optional[Dict[str, Any]] = None
+
+        for line in lines:
+            # Nếu gặp dòng chứa "Đáp án đúng: A" thì bỏ qua
+            if len(line) < 50 and answer_keys_pattern.search(line):
+                continue
+
+            # --- CASE 1: BẮT ĐẦU CÂU HỎI MỚI ---
+            question_match = question_pattern.match(line)
+            if question_match:
+                # Câu hỏi cũ đã đầy đủ -> trả ra luôn
                 if current_question:
-                    questions.append(current_question)
+                    yield current_question
 
-        except Exception as e:
-            print(f"Lỗi khi đọc PDF: {e}")
-            return []
+                # Làm sạch chữ "Câu 1:" để lấy nội dung
+                current_question = {
+                    "content": line[question_match.end():].strip(),
+                    "question_type": "mcq",
+                    "score": 1,
+                    "options": []
+                }
+                current_option = None # Reset option
+                continue
+
+            # --- CASE 2: BẮT ĐẦU ĐÁP ÁN (A, B, C, D) ---
+            # Chỉ xét nếu đang nằm trong 1 câu hỏi
+            if current_question:
+                option_match = option_pattern.match(line)
+                if option_match:
+                    # Lấy nội dung đáp án (bỏ chữ "A." ở đầu)
+                    current_option = {
+                        "content": line[option_match.end():].strip(),
+                        "is_correct": False
+                    }
+                    current_question["options"].append(current_option)
+                    continue
+
+                # --- CASE 3: NỘI DUNG NỐI TIẾP (DÒNG DÀI) ---
+                if current_option:
+                    # Nếu đang đứng ở đáp án -> Nối text vào đáp án
+                    current_option["content"] += " " + line
+                else:
+                    # Nếu chưa có đáp án -> Nối text vào câu hỏi
+                    current_question["content"] += " " + line
 
-        return questions
\ No newline at end of file
+        # Câu hỏi cuối cùng
+        if current_question:
+            yield current_question
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.repositories.exam_repository import ExamRepository
+
+
+@dataclass(frozen=True)
+class AnswerKeyEntry:
+    question_type: str
+    score: float
+    correct_option_ids: FrozenSet[int]
+    option_ids: Tuple[int, ...]
+
+
+AnswerKey = Dict[int, AnswerKeyEntry]  # question_id -> đáp án
+
+
+class GradingService:
+    """
+    Chấm bài dựa trên "answer key" của đề (question_id -> điểm + đáp án đúng).
+
+    Answer key được nạp 1 lần bằng 1 query và cache trong process theo `exams.revision`
+    (tăng khi sửa đáp án). Revision đọc từ DB ở mỗi lần lấy (1 query theo primary key)
+    nên worker khác sửa đáp án thì cache ở mọi worker đều hết hiệu lực.
+    """
+
+    def __init__(self, exam_repo: ExamRepository, maxsize: int = 256) -> None:
+        self.exam_repo = exam_repo
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._keys: "OrderedDict[int, Tuple[int, AnswerKey]]" = OrderedDict()
+
+    def get_answer_key(self, exam_id: int) -> AnswerKey:
+        exam_version = self.exam_repo.get_exam_version(exam_id)
+        if exam_version is None:
+            return {}  # Đề đã bị xóa
+        version = exam_version.revision
+        with self._lock:
+            cached = self._keys.get(exam_id)
+            if cached is not None and cached[0] == version:
+                self._keys.move_to_end(exam_id)
+                return cached[1]
+
+        answer_key = self.build_answer_key(exam_id)
+        with self._lock:
+            self._keys[exam_id] = (version, answer_key)
+            self._keys.move_to_end(exam_id)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+        return answer_key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def build_answer_key(self, exam_id: int) -> AnswerKey:
+        """Nạp answer key trực tiếp từ DB, không qua cache (dùng được trong view @read_only)."""
+        questions: Dict[int, Dict[str, Any]] = {}
+        for question_id, question_type, score, option_id, is_correct in self.exam_repo.load_answer_key_rows(exam_id):
+            entry = questions.setdefault(
+                question_id,
+                {"question_type": question_type, "score": score or 0.0, "correct": set(), "options": []},
+            )
+            if option_id is not None:
+                entry["options"].append(option_id)
+                if is_correct:
+                    entry["correct"].add(option_id)
+
+        return {
+            question_id: AnswerKeyEntry(
+                question_type=entry["question_type"],
+                score=entry["score"],
+                correct_option_ids=frozenset(entry["correct"]),
+                option_ids=tuple(entry["options"]),
+            )
+            for question_id, entry in questions.items()
+        }
+
+    # --- Chấm điểm ---
+    def score_answer(self, entry: AnswerKeyEntry, selected_option_id: Optional[int]) -> float:
+        if entry.question_type == "mcq" and selected_option_id in entry.correct_option_ids:
+            return entry.score
+        # Tự luận: tạm thời để 0, giáo viên chấm tay sau
+        return 0.0
+
+    def normalize_answers(
+        self, answer_key: AnswerKey, attempt_id: int, answers_payload: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Lọc câu trả lời theo answer key và gộp các lần chọn lại cùng một câu
+        (lấy lần sau cùng), trả về các dòng sẵn sàng để upsert vào bảng answers.
+        """
+        rows: Dict[int, Dict[str, Any]] = {}
+        for ans in answers_payload:
+            question_id = ans.get("question_id")
+            entry = answer_key.get(question_id)
+            if entry is None:
+                continue
+
+            selected_option_id = ans.get("selected_option_id")
+            if selected_option_id not in entry.option_ids:
+                selected_option_id = None
+
+            rows[question_id] = {
+                "attempt_id": attempt_id,
+                "question_id": question_id,
+                "selected_option_id": selected_option_id,
+                "essay_answer": ans.get("essay_answer"),
+            }
+        return list(rows.values())
+
+    def grade_stored_answers(self, answer_key: AnswerKey, stored_answers) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Chấm các câu trả lời đã lưu (id, question_id, selected_option_id).
+        Trả về (các dòng {id, score} để bulk update, tổng điểm).
+        """
+        updates = []
+        total_score = 0.0
+        for answer_id, question_id, selected_option_id in stored_answers:
+            entry = answer_key.get(question_id)
+            score = self.score_answer(entry, selected_option_id) if entry is not None else 0.0
+            updates.append({"id": answer_id, "score": score})
+            total_score += score
+        return updates, total_score
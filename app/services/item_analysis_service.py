@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.repositories.exam_repository import ExamRepository
+from app.services.grading_service import GradingService
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+class ItemAnalysisService:
+    """
+    Phân tích câu hỏi sau kỳ thi trên ma trận điểm (bài làm x câu hỏi):
+
+    - p-value (độ khó): điểm trung bình của câu / điểm tối đa của câu
+    - discrimination: tương quan point-biserial giữa điểm câu và tổng điểm các câu còn lại
+    - tần suất chọn từng đáp án (distractor analysis)
+    - Cronbach's alpha của cả đề
+
+    Dữ liệu được nạp bằng 1 query rồi tính hoàn toàn bằng NumPy (không lặp theo bài làm).
+    """
+
+    def __init__(self, exam_repo: ExamRepository, grading_service: GradingService) -> None:
+        self.exam_repo = exam_repo
+        self.grading_service = grading_service
+
+    def analyze(self, exam_id: int) -> Dict[str, Any]:
+        # Không dùng get_answer_key: view chạy trên replica, không được ghi bản trễ vào cache
+        answer_key = self.grading_service.build_answer_key(exam_id)
+        question_ids = np.array(sorted(answer_key), dtype=np.int64)
+        max_scores = np.array([answer_key[q].score for q in question_ids.tolist()], dtype=np.float64)
+
+        rows = self.exam_repo.load_response_rows(exam_id)
+        if rows:
+            data = np.array(rows, dtype=np.float64)  # None -> nan
+            attempt_col, question_col, option_col, score_col = data.T
+        else:
+            attempt_col = question_col = option_col = score_col = np.empty(0)
+
+        # Bỏ câu trả lời của câu hỏi không còn trong đề
+        col = np.searchsorted(question_ids, question_col)
+        valid = col < len(question_ids)
+        valid[valid] = question_ids[col[valid]] == question_col[valid]
+        attempt_ids, row = np.unique(attempt_col[valid], return_inverse=True)
+        col = col[valid]
+
+        # Ma trận điểm: câu không trả lời = 0 điểm
+        scores = np.zeros((len(attempt_ids), len(question_ids)))
+        scores[row, col] = np.nan_to_num(score_col[valid])
+
+        n_attempts, n_items = scores.shape
+        with np.errstate(invalid="ignore", divide="ignore"):
+            p_values = scores.mean(axis=0) / max_scores if n_attempts else np.full(n_items, np.nan)
+            discrimination = self._point_biserial(scores)
+            alpha = self._cronbach_alpha(scores)
+
+        option_counts = self._option_counts(option_col[valid])
+        return {
+            "exam_id": exam_id,
+            "attempt_count": int(n_attempts),
+            "question_count": int(n_items),
+            "cronbach_alpha": _nan_to_none(alpha),
+            "questions": [
+                {
+                    "question_id": question_id,
+                    "question_type": answer_key[question_id].question_type,
+                    "max_score": answer_key[question_id].score,
+                    "p_value": _nan_to_none(p_values[j]),
+                    "discrimination": _nan_to_none(discrimination[j]),
+                    "options": [
+                        {
+                            "option_id": option_id,
+                            "is_correct": option_id in answer_key[question_id].correct_option_ids,
+                            "count": option_counts.get(option_id, 0),
+                            "rate": option_counts.get(option_id, 0) / n_attempts if n_attempts else None,
+                        }
+                        for option_id in answer_key[question_id].option_ids
+                    ],
+                }
+                for j, question_id in enumerate(question_ids.tolist())
+            ],
+        }
+
+    @staticmethod
+    def _point_biserial(scores: np.ndarray) -> np.ndarray:
+        """Tương quan Pearson giữa từng cột và (tổng điểm - cột đó), tính cho mọi cột cùng lúc."""
+        rest = scores.sum(axis=1, keepdims=True) - scores
+        item_dev = scores - scores.mean(axis=0)
+        rest_dev = rest - rest.mean(axis=0)
+        cov = (item_dev * rest_dev).sum(axis=0)
+        return cov / np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+
+    @staticmethod
+    def _cronbach_alpha(scores: np.ndarray) -> float:
+        n_attempts, n_items = scores.shape
+        if n_items < 2 or n_attempts < 2:
+            return float("nan")
+        item_var = scores.var(axis=0, ddof=1).sum()
+        total_var = scores.sum(axis=1).var(ddof=1)
+        return n_items / (n_items - 1) * (1.0 - item_var / total_var)
+
+    @staticmethod
+    def _option_counts(option_col: np.ndarray) -> Dict[int, int]:
+        selected = option_col[~np.isnan(option_col)].astype(np.int64)
+        option_ids, counts = np.unique(selected, return_counts=True)
+        return dict(zip(option_ids.tolist(), counts.tolist()))
@@ -0,0 +1,73 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Băm / kiểm tra mật khẩu theo policy cấu hình được (thuật toán + độ khó của werkzeug,
+    VD: "scrypt:16384:8:1", "pbkdf2:sha256:600000").
+
+    - Việc băm chạy trong thread pool giới hạn số thread (PASSWORD_HASH_WORKERS) nên lúc
+      cả trường đăng nhập cùng lúc, các request khác vẫn còn CPU để chạy.
+    - Quá PASSWORD_HASH_MAX_PENDING lượt đang chờ -> PasswordHasherBusy (controller trả 503)
+      thay vì để request xếp hàng tới timeout.
+    - needs_rehash(): hash cũ khác policy hiện tại -> băm lại khi user đăng nhập thành công.
+    """
+
+    def __init__(self, method: str = "scrypt", max_workers: Optional[int] = None, max_pending: int = 64) -> None:
+        self.method = method
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        # Chuẩn hóa về dạng đầy đủ (VD: "scrypt" -> "scrypt:32768:8:1") để so sánh với hash đã lưu.
+        # Tham số sai (VD: thuật toán không tồn tại) sẽ báo lỗi ngay lúc khởi động.
+        method = app.config.get("PASSWORD_HASH_METHOD") or self.method
+        self.method = generate_password_hash("", method=method).split("$", 1)[0]
+        self.max_workers = app.config.get("PASSWORD_HASH_WORKERS") or self.max_workers
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        app.extensions["password_hasher"] = self
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherBusy("Hệ thống đang bận, vui lòng thử lại sau giây lát")
+            self._pending += 1
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    # --- API ---
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.split("$", 1)[0] != self.method
+
+
+password_hasher = PasswordHasher()
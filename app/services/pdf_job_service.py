@@ -0,0 +1,195 @@
+import io
+import json
+import multiprocessing
+import os
+import re
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+try:
+    import resource  # Không có trên Windows
+except ImportError:  # pragma: no cover
+    resource = None
+
+from app.services.exam_pdf_service import ExamPdfParser
+from app.services.pdf_parse_cache import pdf_parse_cache
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class PdfJobTimeout(BaseException):
+    """Kế thừa BaseException để không bị các khối `except Exception` trong parser nuốt mất."""
+
+
+class PdfJobQueueFull(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise PdfJobTimeout()
+
+
+def run_parse_job(data: bytes, time_limit: int, memory_limit_mb: int) -> Dict[str, Any]:
+    """Chạy trong process con của pool: parse PDF với giới hạn thời gian và bộ nhớ."""
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    use_alarm = hasattr(signal, "SIGALRM") and time_limit
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(time_limit)
+
+    try:
+        questions = ExamPdfParser().parse_file_strict(io.BytesIO(data))
+        return {"status": "done", "questions": questions, "count": len(questions)}
+    except PdfJobTimeout:
+        return {"status": "failed", "error": f"Quá thời gian xử lý ({time_limit}s)"}
+    except MemoryError:
+        return {"status": "failed", "error": f"Vượt giới hạn bộ nhớ ({memory_limit_mb}MB)"}
+    except Exception as e:
+        return {"status": "failed", "error": str(e)}
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+class PdfImportJobManager:
+    """
+    Parse PDF bất đồng bộ trong ProcessPoolExecutor có giới hạn số process.
+
+    Trạng thái job được ghi ra file JSON trong PDF_JOB_DIR nên mọi gunicorn worker
+    trên cùng máy đều đọc được (client có thể poll vào worker khác worker đã nhận file).
+    """
+
+    def __init__(self) -> None:
+        self.max_workers = 2
+        self.time_limit = 60
+        self.memory_limit_mb = 1024
+        self.max_pending = 20
+        self.result_ttl = 3600
+        self.job_dir = os.path.join(tempfile.gettempdir(), "webkiemtra_pdf_jobs")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.max_workers = app.config.get("PDF_JOB_WORKERS", self.max_workers)
+        self.time_limit = app.config.get("PDF_JOB_TIME_LIMIT", self.time_limit)
+        self.memory_limit_mb = app.config.get("PDF_JOB_MEMORY_LIMIT_MB", self.memory_limit_mb)
+        self.max_pending = app.config.get("PDF_JOB_MAX_PENDING", self.max_pending)
+        self.result_ttl = app.config.get("PDF_JOB_RESULT_TTL", self.result_ttl)
+        self.job_dir = app.config.get("PDF_JOB_DIR") or self.job_dir
+        app.extensions["pdf_jobs"] = self
+
+    # --- Pool ---
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Tạo lazily (sau khi gunicorn fork worker), dùng "spawn" để process con không
+        # thừa hưởng connection DB / thread của worker
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, data: bytes, filename: str) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PdfJobQueueFull("Hệ thống đang bận xử lý PDF, vui lòng thử lại sau")
+            self._pending += 1
+
+        # Mọi lỗi trước khi job vào pool (ghi đĩa, đọc cache, pool hỏng) phải trả lại suất đã giữ
+        try:
+            os.makedirs(self.job_dir, exist_ok=True)
+            self._prune_expired()
+
+            job_id = uuid.uuid4().hex
+            job = {"job_id": job_id, "status": "queued", "filename": filename, "created_at": time.time()}
+
+            # File đã từng parse -> trả kết quả ngay, không chiếm process trong pool
+            cache_key = pdf_parse_cache.key(data)
+            cached = pdf_parse_cache.get(cache_key)
+            if cached is not None:
+                job = dict(job, status="done", questions=cached, count=len(cached), finished_at=time.time())
+                self._write(job)
+                future = None
+            else:
+                self._write(job)
+                with self._lock:
+                    try:
+                        future = self._get_executor().submit(
+                            run_parse_job, data, self.time_limit, self.memory_limit_mb
+                        )
+                    except BrokenProcessPool:
+                        # Process con bị kill (VD: OOM killer) -> tạo lại pool
+                        self._executor = None
+                        future = self._get_executor().submit(
+                            run_parse_job, data, self.time_limit, self.memory_limit_mb
+                        )
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        if future is None:
+            with self._lock:
+                self._pending -= 1
+            return job
+
+        future.add_done_callback(lambda f: self._on_done(job, cache_key, f))
+        return job
+
+    def _on_done(self, job: Dict[str, Any], cache_key: str, future) -> None:
+        with self._lock:
+            self._pending -= 1
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"status": "failed", "error": f"Process xử lý PDF bị lỗi: {e!r}"}
+        if result["status"] == "done" and result["questions"]:
+            pdf_parse_cache.set(cache_key, result["questions"])
+        self._write(dict(job, finished_at=time.time(), **result))
+
+    # --- Lưu trạng thái ---
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        # Ghi file tạm rồi os.replace để worker khác không đọc phải file ghi dở
+        path = self._path(job["job_id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _prune_expired(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        for name in os.listdir(self.job_dir):
+            path = os.path.join(self.job_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+pdf_job_manager = PdfImportJobManager()
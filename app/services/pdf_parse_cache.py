@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.services.exam_pdf_service import ExamPdfParser
+
+
+class PdfParseCache:
+    """
+    Cache kết quả parse PDF trên đĩa, key = SHA-256(nội dung file) + version của parser.
+
+    - Lưu trên đĩa nên sống qua restart và dùng chung giữa các gunicorn worker.
+    - Giới hạn tổng dung lượng, vượt quá thì xóa file ít được dùng nhất (LRU theo mtime,
+      mỗi lần hit sẽ "touch" lại file).
+    - Đổi ExamPdfParser.VERSION là toàn bộ kết quả cũ tự hết hiệu lực.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "webkiemtra_pdf_cache")
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def init_app(self, app) -> None:
+        self.directory = app.config.get("PDF_PARSE_CACHE_DIR") or self.directory
+        self.max_bytes = app.config.get("PDF_PARSE_CACHE_MAX_MB", self.max_bytes // (1024 * 1024)) * 1024 * 1024
+        self.enabled = self.max_bytes > 0
+        app.extensions["pdf_parse_cache"] = self
+
+    @staticmethod
+    def key(data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}-v{ExamPdfParser.VERSION}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                questions = json.load(f)
+            os.utime(path)  # Đánh dấu vừa dùng (LRU)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["hits"] += 1
+        return questions
+
+    def set(self, key: str, questions: List[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # Ghi file tạm rồi os.replace để không ai đọc phải file ghi dở
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(questions, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+pdf_parse_cache = PdfParseCache()
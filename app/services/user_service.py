@@ -1,10 +1,9 @@
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
-from werkzeug.security import check_password_hash, generate_password_hash
-
 from app.models.user_model import User
 from app.repositories.user_repository import UserRepository
+from app.services.password_hasher import PasswordHasher, password_hasher
 
 
 @dataclass
@@ -16,12 +15,14 @@ class AuthResult:
 class UserService:
     """Business logic cho đăng ký / đăng nhập."""
 
-    def __init__(self, user_repo: UserRepository, jwt_encode) -> None:
+    def __init__(self, user_repo: UserRepository, jwt_encode, hasher: PasswordHasher = password_hasher) -> None:
         """
         jwt_encode: hàm nhận dict payload và trả về chuỗi token (được inject từ layer khác).
+        hasher: policy băm mật khẩu (thuật toán, độ khó, thread pool giới hạn).
         """
         self.user_repo = user_repo
         self.jwt_encode = jwt_encode
+        self.hasher = hasher
 
     # --- Đăng ký ---
     def register(self, username: str, password: str, full_name: Optional[str], role: str) -> AuthResult:
@@ -32,7 +33,7 @@ class UserService:
         if existing:
             raise ValueError("Username đã tồn tại")
 
-        password_hash = generate_password_hash(password)
+        password_hash = self.hasher.hash(password)
         user = self.user_repo.create_user(username, password_hash, full_name, role)
 
         token = self._create_token(user)
@@ -41,9 +42,13 @@ class UserService:
     # --- Đăng nhập ---
     def login(self, username: str, password: str) -> AuthResult:
         user = self.user_repo.get_by_username(username)
-        if not user or not check_password_hash(user.password, password):
+        if not user or not self.hasher.verify(user.password, password):
             raise ValueError("Sai tên đăng nhập hoặc mật khẩu")
 
+        # Hash tạo theo policy cũ (thuật toán / độ khó) -> băm lại theo policy hiện tại
+        if self.hasher.needs_rehash(user.password):
+            self.user_repo.update_password(user, self.hasher.hash(password))
+
         token = self._create_token(user)
         return AuthResult(user=user, token=token)
 
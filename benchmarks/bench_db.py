@@ -0,0 +1,50 @@
+"""
+Chọn DB cho các benchmark có ghi dữ liệu (chúng drop_all / create_all trên DB này).
+
+Không bao giờ dùng DATABASE_URL của app (có thể đang trỏ vào DB thật): DB phải được chỉ rõ
+bằng --database-url hoặc biến môi trường BENCH_DATABASE_URL, VD:
+
+    python benchmarks/start_storm.py --database-url sqlite:////tmp/start_storm.db
+    BENCH_DATABASE_URL=postgresql://localhost/webkiemtra_bench python benchmarks/bench_login.py
+"""
+import argparse
+import os
+import sys
+
+from dotenv import dotenv_values
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HELP = "DB dùng để đo (sẽ bị xóa sạch), mặc định lấy từ BENCH_DATABASE_URL"
+
+
+def use_bench_database(argv=None) -> str:
+    """
+    Đọc --database-url / BENCH_DATABASE_URL rồi đặt làm DATABASE_URL cho app.
+    Phải gọi trước khi import `app` (Config đọc DATABASE_URL lúc import). Thoát nếu thiếu
+    hoặc trùng DATABASE_URL của app (biến môi trường / file .env).
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("-h", "--help", action="store_true")
+    args = parser.parse_known_args(argv)[0]
+    url = args.database_url
+    if args.help and not url:
+        # Chỉ in --help: app vẫn cần DATABASE_URL lúc import, dùng SQLite trong RAM
+        url = "sqlite://"
+    elif not url:
+        sys.exit("Cần chỉ rõ DB cho benchmark (sẽ bị drop_all): --database-url <url> hoặc BENCH_DATABASE_URL")
+
+    app_urls = {os.getenv("DATABASE_URL"), dotenv_values(os.path.join(ROOT_DIR, ".env")).get("DATABASE_URL")}
+    if url in app_urls:
+        sys.exit("Không chạy benchmark trên DATABASE_URL của app, hãy dùng 1 DB riêng")
+
+    os.environ["DATABASE_URL"] = url
+    # Không đọc từ replica của app (chuỗi rỗng để load_dotenv không nạp lại từ .env)
+    os.environ["DATABASE_REPLICA_URL"] = ""
+    return url
+
+
+def add_database_url_argument(parser: argparse.ArgumentParser) -> None:
+    """Khai báo lại --database-url trong parser chính (để có trong --help)."""
+    parser.add_argument("--database-url", help=HELP)
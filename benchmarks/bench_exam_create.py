@@ -0,0 +1,144 @@
+"""
+So sánh tạo đề thi: cách cũ (flush sau từng câu hỏi) với ExamRepository.create_full_exam
+hiện tại (INSERT nhiều dòng + RETURNING) và create_many_exams (nhiều đề / 1 transaction).
+
+    python benchmarks/bench_exam_create.py --questions 200 --options 4 --exams 10
+
+In ra thời gian tốt nhất và số câu SQL mỗi cách. DB đo phải chỉ rõ bằng --database-url hoặc
+BENCH_DATABASE_URL (sẽ bị xóa sạch, xem bench_db.py); đo với PostgreSQL local thì khác biệt
+round-trip rõ hơn nhiều.
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_db import add_database_url_argument, use_bench_database  # noqa: E402
+
+use_bench_database()
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions.db import db  # noqa: E402
+from app.models.exam_model import Exam, Option, Question  # noqa: E402
+from app.repositories.exam_repository import ExamRepository  # noqa: E402
+
+
+def make_exam_data(questions: int, options: int) -> dict:
+    return {
+        "title": "Benchmark exam",
+        "description": "",
+        "duration": 45,
+        "questions": [
+            {
+                "content": f"Question {q}",
+                "question_type": "mcq",
+                "score": 1,
+                "options": [{"content": f"Option {o}", "is_correct": o == 0} for o in range(options)],
+            }
+            for q in range(questions)
+        ],
+    }
+
+
+def legacy_create_full_exam(data, created_by=None):
+    """Bản cũ của create_full_exam: flush sau mỗi câu hỏi để lấy question.id."""
+    try:
+        new_exam = Exam(
+            title=data['title'],
+            description=data.get('description', ''),
+            duration=int(data['duration']),
+            created_by=created_by
+        )
+        db.session.add(new_exam)
+        db.session.flush()
+
+        for q_data in data.get('questions', []):
+            new_question = Question(
+                exam_id=new_exam.id,
+                content=q_data['content'],
+                question_type=q_data.get('question_type', 'mcq'),
+                score=float(q_data.get('score', 1.0))
+            )
+            db.session.add(new_question)
+            db.session.flush()
+
+            if new_question.question_type == 'mcq':
+                for opt_data in q_data.get('options', []):
+                    db.session.add(Option(
+                        question_id=new_question.id,
+                        content=opt_data['content'],
+                        is_correct=opt_data.get('is_correct', False)
+                    ))
+
+        db.session.commit()
+        return new_exam
+    except Exception as e:
+        db.session.rollback()
+        raise e
+
+
+def measure(fn, repeat: int):
+    statements = [0]
+
+    def count(*_args, **_kwargs):
+        statements[0] += 1
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            statements[0] = 0
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+            db.session.expunge_all()
+        return best, statements[0]
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--options", type=int, default=4)
+    parser.add_argument("--exams", type=int, default=10, help="số đề cho lần đo import hàng loạt")
+    parser.add_argument("--repeat", type=int, default=5)
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+
+    app = create_app()
+    repo = ExamRepository()
+    data = make_exam_data(args.questions, args.options)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        results = [
+            ("legacy (flush từng câu)", measure(lambda: legacy_create_full_exam(data), args.repeat)),
+            ("create_full_exam", measure(lambda: repo.create_full_exam(data), args.repeat)),
+            (
+                f"legacy x{args.exams}",
+                measure(lambda: [legacy_create_full_exam(data) for _ in range(args.exams)], args.repeat),
+            ),
+            (
+                f"create_many_exams x{args.exams}",
+                measure(lambda: repo.create_many_exams([data] * args.exams), args.repeat),
+            ),
+        ]
+        dialect = db.engine.dialect.name
+
+    print(f"{args.questions} câu x {args.options} đáp án ({dialect})")
+    for name, (seconds, statements) in results:
+        print(f"  {name:<28} {seconds * 1000:9.1f} ms  {statements:6d} câu SQL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+So sánh chi phí dựng + serialize response JSON lớn (không đụng DB):
+
+- legacy: dict viết tay trong controller + jsonify của Flask (json stdlib), như trước đây
+- std:    app.controllers.serializers + StdJSONProvider
+- orjson: app.controllers.serializers + OrJSONProvider
+
+    python benchmarks/bench_json.py --attempts 100 --questions 50
+
+Payload: 1 trang GET /api/exams/<id>/attempts (`--attempts` bài x `--questions` câu trả lời)
+và GET /api/exams/attempts/<id> (đề `--questions` câu x 4 đáp án + câu trả lời).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.controllers import serializers  # noqa: E402
+from app.extensions.json_provider import OrJSONProvider, StdJSONProvider, orjson  # noqa: E402
+
+
+def make_attempt(attempt_id: int, exam, questions: int):
+    return SimpleNamespace(
+        id=attempt_id,
+        exam_id=exam.id,
+        exam=exam,
+        user_id=1000 + attempt_id,
+        student=SimpleNamespace(username=f"student{attempt_id}"),
+        total_score=float(questions // 2),
+        start_time=datetime(2024, 5, 1, 8, 0),
+        end_time=datetime(2024, 5, 1, 8, 45),
+        answers=[
+            SimpleNamespace(
+                question_id=q,
+                selected_option_id=q * 4 if q % 5 else None,
+                essay_answer=None if q % 5 else "Câu trả lời tự luận của học sinh",
+                score=1.0,
+            )
+            for q in range(questions)
+        ],
+    )
+
+
+def make_exam(questions: int):
+    return SimpleNamespace(
+        id=1,
+        title="Kiểm tra giữa kỳ",
+        description="",
+        duration=45,
+        created_at=datetime(2024, 5, 1),
+        questions=[
+            SimpleNamespace(
+                id=q,
+                content=f"Câu hỏi số {q}: nội dung câu hỏi",
+                question_type="mcq" if q % 5 else "essay",
+                score=1.0,
+                options=[
+                    SimpleNamespace(id=q * 4 + o, content=f"Đáp án {o}", is_correct=o == 0) for o in range(4)
+                ],
+            )
+            for q in range(questions)
+        ],
+    )
+
+
+def legacy_attempts_page(attempts):
+    """Bản cũ của get_exam_attempts (dict viết tay)."""
+    return {
+        "items": [
+            {
+                "attempt_id": a.id,
+                "student_id": a.user_id,
+                "student_name": a.student.username if a.student else None,
+                "total_score": a.total_score,
+                "start_time": a.start_time.isoformat() if a.start_time else None,
+                "end_time": a.end_time.isoformat() if a.end_time else None,
+                "answers": [
+                    {
+                        "question_id": ans.question_id,
+                        "selected_option_id": ans.selected_option_id,
+                        "essay_answer": ans.essay_answer,
+                        "score": ans.score,
+                    }
+                    for ans in a.answers
+                ],
+            }
+            for a in attempts
+        ],
+        "next_cursor": None,
+    }
+
+
+def legacy_attempt_detail(attempt):
+    """Bản cũ của get_attempt_detail (dict viết tay)."""
+    exam = attempt.exam
+    return {
+        "attempt_id": attempt.id,
+        "exam_id": exam.id,
+        "exam_title": exam.title,
+        "total_score": attempt.total_score,
+        "start_time": attempt.start_time.isoformat() if attempt.start_time else None,
+        "end_time": attempt.end_time.isoformat() if attempt.end_time else None,
+        "questions": [
+            {
+                "id": q.id,
+                "content": q.content,
+                "question_type": q.question_type,
+                "score": q.score,
+                "options": [{"id": o.id, "content": o.content} for o in q.options] if q.question_type == "mcq" else [],
+            }
+            for q in exam.questions
+        ],
+        "answers": [
+            {
+                "question_id": ans.question_id,
+                "selected_option_id": ans.selected_option_id,
+                "essay_answer": ans.essay_answer,
+                "score": ans.score,
+            }
+            for ans in attempt.answers
+        ],
+    }
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=100, help="số bài làm trong 1 trang")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    exam = make_exam(args.questions)
+    attempts = [make_attempt(i, exam, args.questions) for i in range(args.attempts)]
+
+    def attempts_page():
+        return {"items": [serializers.exam_attempt_dict(a) for a in attempts], "next_cursor": None}
+
+    cases = [
+        ("legacy", DefaultJSONProvider, legacy_attempts_page, legacy_attempt_detail),
+        ("std", StdJSONProvider, lambda _attempts: attempts_page(), serializers.attempt_detail),
+    ]
+    if orjson is not None:
+        cases.append(("orjson", OrJSONProvider, lambda _attempts: attempts_page(), serializers.attempt_detail))
+    else:
+        print("(chưa cài orjson, bỏ qua)")
+
+    app = Flask(__name__)
+    print(f"{args.attempts} bài x {args.questions} câu, tốt nhất sau {args.repeat} lần")
+    with app.app_context():
+        for name, provider_class, page_fn, detail_fn in cases:
+            app.json = provider_class(app)
+            page = best_of(lambda: app.json.response(page_fn(attempts)), args.repeat)
+            detail = best_of(lambda: app.json.response(detail_fn(attempts[0])), args.repeat)
+            size = len(app.json.response(page_fn(attempts)).get_data())
+            print(f"  {name:<8} attempts page {page * 1000:8.2f} ms ({size // 1024} KB)  attempt detail {detail * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Đo thông lượng POST /api/auth/login (logins/giây, và chia theo số core) với từng policy băm mật khẩu.
+
+    python benchmarks/bench_login.py --methods scrypt,scrypt:16384:8:1,pbkdf2:sha256:600000 --logins 200
+
+Mỗi policy: tạo user với hash theo policy đó, rồi bắn `--logins` request đăng nhập song song
+(`--clients` thread). Băm mật khẩu chạy trong pool PASSWORD_HASH_WORKERS thread (mặc định = số CPU)
+nên số core dùng được = min(PASSWORD_HASH_WORKERS, số CPU).
+
+DB đo phải chỉ rõ bằng --database-url hoặc BENCH_DATABASE_URL (sẽ bị xóa sạch, xem bench_db.py).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_db import add_database_url_argument, use_bench_database  # noqa: E402
+
+use_bench_database()
+# Mọi request đều từ 1 IP: tắt rate limit để đo đúng chi phí băm mật khẩu
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions.db import db  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+from app.services.password_hasher import password_hasher  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+def seed(app, method: str, users: int):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Cùng 1 hash cho mọi user để seed nhanh (salt giống nhau không ảnh hưởng thời gian verify)
+        password_hash = generate_password_hash(PASSWORD, method=method)
+        db.session.add_all(
+            [User(username=f"student{i}", password=password_hash, role="student") for i in range(users)]
+        )
+        db.session.commit()
+
+
+def run(method: str, args) -> float:
+    app = create_app()
+    app.config["PASSWORD_HASH_METHOD"] = method
+    password_hasher.init_app(app)
+    seed(app, method, args.users)
+
+    def login(i):
+        client = app.test_client()
+        return client.post("/api/auth/login", json={"username": f"student{i % args.users}", "password": PASSWORD})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        statuses = [r.status_code for r in pool.map(login, range(args.logins))]
+    elapsed = time.perf_counter() - started
+
+    failed = len([s for s in statuses if s != 200])
+    if failed:
+        print(f"  {method}: {failed} request lỗi ({set(statuses)})")
+    return args.logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", default="scrypt,scrypt:16384:8:1,pbkdf2:sha256:600000")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=16, help="số request đồng thời")
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+
+    cores = min(password_hasher.max_workers, os.cpu_count() or 1)
+    print(f"{args.logins} logins, {args.clients} clients, {cores} core(s) cho việc băm")
+    for method in args.methods.split(","):
+        rate = run(method.strip(), args)
+        print(f"  {password_hasher.method:<28} {rate:8.1f} logins/s  {rate / cores:8.1f} logins/s/core")
+
+
+if __name__ == "__main__":
+    main()
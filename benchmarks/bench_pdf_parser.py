@@ -0,0 +1,206 @@
+"""
+Benchmark ExamPdfParser trên bộ PDF tổng hợp (sinh offline bằng pdf_corpus.py).
+
+Đo riêng 2 giai đoạn:
+    - extract: pdfplumber trích text từng trang (ExamPdfParser.iter_lines)
+    - scan:    quét regex trên các dòng đã trích (ExamPdfParser.scan_lines)
+
+và báo cáo pages/s, questions/s, peak memory (tracemalloc) cho từng layout/kích thước.
+
+Số tuyệt đối (pages/s, ...) phụ thuộc máy nên chỉ để tham khảo. Để so với baseline, mỗi giai
+đoạn được đo thêm 1 bản "tham chiếu" ngay trong cùng lần chạy, trên cùng máy:
+    - extract: gọi thẳng pdfplumber page.extract_text() (không làm sạch dòng / giải phóng trang)
+    - scan:    vòng lặp ngây thơ chạy cả 3 regex của parser trên mọi dòng, không giữ trạng thái
+rồi so sánh tỉ lệ throughput parser / tham chiếu (máy nhanh hay chậm thì cả 2 cùng đổi).
+
+    python benchmarks/bench_pdf_parser.py                  # chạy + so sánh với baseline
+    python benchmarks/bench_pdf_parser.py --save-baseline  # ghi lại baseline
+    python benchmarks/bench_pdf_parser.py --pages 1 10 --layouts vi
+
+Thoát với mã 1 nếu tỉ lệ throughput giảm, peak memory tăng quá --tolerance so với baseline
+hoặc số câu hỏi parse được thay đổi. Baseline commit trong repo (baselines/pdf_parser.json)
+nên được tạo lại bằng --save-baseline khi đổi phiên bản Python / pdfplumber; muốn dùng
+baseline riêng cho 1 máy thì truyền --baseline <file> (cả lúc lưu lẫn lúc so sánh).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import pdfplumber
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from app.services.exam_pdf_service import ExamPdfParser  # noqa: E402
+from pdf_corpus import LAYOUTS, make_exam_pdf  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines", "pdf_parser.json")
+DEFAULT_PAGES = (1, 10, 50, 200)
+
+
+def _timed_pair(fn, reference, min_runs: int = 3, min_seconds: float = 0.3):
+    """
+    Chạy xen kẽ fn và bản tham chiếu (để tải máy thay đổi giữa chừng ảnh hưởng như nhau tới cả 2),
+    mỗi bên ít nhất min_runs lần và đủ min_seconds. Trả về (kết quả fn, thời gian nhanh nhất 1 lần
+    của fn, của tham chiếu). Lấy lần nhanh nhất thay vì trung bình để giảm nhiễu.
+    """
+    best, best_reference = float("inf"), float("inf")
+    runs = 0
+    started = time.perf_counter()
+    while runs < min_runs or time.perf_counter() - started < 2 * min_seconds:
+        t0 = time.perf_counter()
+        result = fn()
+        t1 = time.perf_counter()
+        reference()
+        t2 = time.perf_counter()
+        best, best_reference = min(best, t1 - t0), min(best_reference, t2 - t1)
+        runs += 1
+    return result, best, best_reference
+
+
+def _peak_kib(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def reference_extract(pdf: bytes) -> list:
+    """Tham chiếu cho extract: chỉ pdfplumber, không thêm xử lý của parser."""
+    with pdfplumber.open(io.BytesIO(pdf)) as document:
+        return [page.extract_text() for page in document.pages]
+
+
+def reference_scan(lines) -> int:
+    """Tham chiếu cho scan: chạy cả 3 regex trên mọi dòng, không dựng câu hỏi."""
+    patterns = (ExamPdfParser.question_pattern, ExamPdfParser.option_pattern, ExamPdfParser.answer_keys_pattern)
+    matched = 0
+    for line in lines:
+        for pattern in patterns:
+            if pattern.search(line):
+                matched += 1
+    return matched
+
+
+def bench_case(layout: str, pages: int) -> dict:
+    parser = ExamPdfParser()
+    pdf = make_exam_pdf(pages, layout)
+
+    def extract():
+        return list(parser.iter_lines(io.BytesIO(pdf)))
+
+    lines, extract_s, reference_extract_s = _timed_pair(extract, lambda: reference_extract(pdf))
+
+    def scan():
+        return list(parser.scan_lines(lines))
+
+    questions, scan_s, reference_scan_s = _timed_pair(scan, lambda: reference_scan(lines))
+
+    return {
+        "layout": layout,
+        "pages": pages,
+        "pdf_kib": len(pdf) // 1024,
+        "lines": len(lines),
+        "questions": len(questions),
+        "extract_pages_per_s": round(pages / extract_s, 1),
+        "extract_vs_reference": round(reference_extract_s / extract_s, 3),
+        "extract_peak_kib": _peak_kib(extract),
+        "scan_lines_per_s": round(len(lines) / scan_s),
+        "scan_questions_per_s": round(len(questions) / scan_s),
+        "scan_vs_reference": round(reference_scan_s / scan_s, 3),
+        "scan_peak_kib": _peak_kib(scan),
+    }
+
+
+def environment() -> dict:
+    """Phiên bản ảnh hưởng tới tỉ lệ / bộ nhớ, ghi cùng baseline để cảnh báo khi khác."""
+    return {"python": platform.python_version(), "pdfplumber": pdfplumber.__version__}
+
+
+def compare(results, baseline, tolerance: float):
+    """Trả về danh sách mô tả các chỉ số bị regression."""
+    by_case = {(b["layout"], b["pages"]): b for b in baseline.get("results", [])}
+    problems = []
+    for r in results:
+        base = by_case.get((r["layout"], r["pages"]))
+        if base is None:
+            continue
+        name = f'{r["layout"]}/{r["pages"]}p'
+        # Chỉ so tỉ lệ với tham chiếu đo cùng lần chạy, không so pages/s tuyệt đối giữa các máy
+        for key in ("extract_vs_reference", "scan_vs_reference"):
+            if key in base and r[key] < base[key] * (1 - tolerance):
+                problems.append(f"{name} {key}: {r[key]} < baseline {base[key]}")
+        for key in ("extract_peak_kib", "scan_peak_kib"):
+            # Bỏ qua chênh lệch nhỏ (< 256 KiB) do nhiễu của allocator
+            if r[key] > base[key] * (1 + tolerance) + 256:
+                problems.append(f"{name} {key}: {r[key]} > baseline {base[key]}")
+        if r["questions"] != base["questions"]:
+            problems.append(f'{name} questions: {r["questions"]} != baseline {base["questions"]}')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGES))
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=LAYOUTS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="mức chênh lệch cho phép (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    header = (
+        f'{"case":<14}{"lines":>7}{"quest":>7}{"extract p/s":>13}{"x ref":>7}{"extract KiB":>13}'
+        f'{"scan q/s":>11}{"x ref":>7}{"scan KiB":>10}'
+    )
+    print(header)
+    results = []
+    for layout in args.layouts:
+        for pages in args.pages:
+            r = bench_case(layout, pages)
+            results.append(r)
+            print(
+                f'{layout + "/" + str(pages) + "p":<14}{r["lines"]:>7}{r["questions"]:>7}'
+                f'{r["extract_pages_per_s"]:>13}{r["extract_vs_reference"]:>7}{r["extract_peak_kib"]:>13}'
+                f'{r["scan_questions_per_s"]:>11}{r["scan_vs_reference"]:>7}{r["scan_peak_kib"]:>10}'
+            )
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {"parser_version": ExamPdfParser.VERSION, "environment": environment(), "results": results}, f, indent=2
+            )
+            f.write("\n")
+        print(f"Đã lưu baseline: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Chưa có baseline, chạy lại với --save-baseline để tạo.")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(
+            f'Cảnh báo: baseline đo với {baseline.get("environment")}, đang chạy {environment()}; '
+            "nếu báo regression hãy tạo lại baseline (--save-baseline) trước khi kết luận."
+        )
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print("REGRESSION:")
+        for p in problems:
+            print("  -", p)
+        sys.exit(1)
+    print("OK: không có regression so với baseline")
+
+
+if __name__ == "__main__":
+    main()
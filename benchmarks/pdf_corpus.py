@@ -0,0 +1,110 @@
+"""
+Sinh PDF đề thi tổng hợp (không cần thư viện ngoài, không cần mạng) cho benchmark parser.
+
+Layout hỗ trợ:
+    - "vi":      "Câu 1: ..."  + đáp án "A. ..."
+    - "numeric": "1. ..."      + đáp án "a) ..."
+    - "en":      "Question 1) ..." + đáp án "A/ ..."
+
+Text dùng font chuẩn Helvetica (WinAnsiEncoding) nên chỉ gồm ký tự có trong cp1252.
+"""
+import random
+from typing import List
+
+LAYOUTS = ("vi", "numeric", "en")
+LINES_PER_PAGE = 48
+
+# Tiếng Việt không dấu (font chuẩn không có đủ ký tự có dấu)
+_WORDS = (
+    "ham so dao ham tich phan gioi han phuong trinh nghiem bieu thuc gia tri lon nhat "
+    "nho nhat do thi toa do vector xac suat thong ke day so cap so cong nhan hinh hoc"
+).split()
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _question_lines(rng: random.Random, layout: str, number: int) -> List[str]:
+    if layout == "vi":
+        head, labels = f"Câu {number}:", ["A.", "B.", "C.", "D."]
+    elif layout == "numeric":
+        head, labels = f"{number}.", ["a)", "b)", "c)", "d)"]
+    else:
+        head, labels = f"Question {number})", ["A/", "B/", "C/", "D/"]
+
+    lines = [f"{head} {_sentence(rng, 6, 12)}"]
+    # Thỉnh thoảng câu hỏi dài xuống dòng
+    if rng.random() < 0.3:
+        lines.append(_sentence(rng, 5, 10))
+    lines += [f"{label} {_sentence(rng, 1, 5)}" for label in labels]
+    if rng.random() < 0.1:
+        # Dòng đáp án mà parser phải bỏ qua
+        lines.append(f"Answer key: {rng.choice('ABCD')}")
+    return lines
+
+
+def corpus_lines(pages: int, layout: str, seed: int = 0) -> List[List[str]]:
+    """Danh sách dòng text cho từng trang."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout phải là một trong {LAYOUTS}")
+    rng = random.Random(f"{seed}-{layout}-{pages}")
+    result: List[List[str]] = []
+    current: List[str] = []
+    number = 1
+    while len(result) < pages:
+        block = _question_lines(rng, layout, number)
+        number += 1
+        if len(current) + len(block) > LINES_PER_PAGE:
+            result.append(current)
+            current = []
+        current.extend(block)
+    return result
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def build_pdf(pages_lines: List[List[str]]) -> bytes:
+    """Ghi PDF 1.4 tối giản: mỗi trang 1 content stream, font Helvetica chuẩn."""
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(b"")  # điền sau khi biết danh sách trang
+    page_ids = []
+    for lines in pages_lines:
+        ops = [b"BT /F1 10 Tf 15 TL 40 800 Td"]
+        ops += [b"(" + _escape(line) + b") Tj T*" for line in lines]
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+            )
+        )
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_at)
+    return bytes(out)
+
+
+def make_exam_pdf(pages: int, layout: str = "vi", seed: int = 0) -> bytes:
+    return build_pdf(corpus_lines(pages, layout, seed))
@@ -0,0 +1,91 @@
+"""
+Kiểm tra start_exam khi cả lớp bấm "Bắt đầu" cùng lúc.
+
+Bắn song song nhiều request POST /api/exams/<id>/start cho mỗi học sinh (mô phỏng
+double-click / retry) rồi kiểm tra mỗi học sinh chỉ có đúng 1 attempt đang mở.
+
+    python benchmarks/start_storm.py --database-url sqlite:////tmp/start_storm.db --students 200 --clicks 3 --workers 32
+
+DB đo phải chỉ rõ bằng --database-url hoặc BENCH_DATABASE_URL (sẽ bị xóa sạch, xem bench_db.py).
+Cùng kịch bản có test tự động: tests/test_concurrent_attempts.py.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_db import add_database_url_argument, use_bench_database  # noqa: E402
+
+use_bench_database()
+
+from app import create_app  # noqa: E402
+from app.extensions.db import db  # noqa: E402
+from app.extensions.jwt import encode_access_token  # noqa: E402
+from app.models.attempt_model import ExamAttempt  # noqa: E402
+from app.models.exam_model import Exam  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+
+
+def seed(app, students: int):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        teacher = User(username="teacher", password="x", role="teacher")
+        db.session.add(teacher)
+        db.session.flush()
+        exam = Exam(title="Start storm", duration=45, created_by=teacher.id)
+        db.session.add(exam)
+        users = [User(username=f"student{i}", password="x", role="student") for i in range(students)]
+        db.session.add_all(users)
+        db.session.commit()
+        return exam.id, [u.id for u in users]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--clicks", type=int, default=3, help="số request start mỗi học sinh")
+    parser.add_argument("--workers", type=int, default=16)
+    add_database_url_argument(parser)
+    args = parser.parse_args()
+
+    app = create_app()
+    exam_id, student_ids = seed(app, args.students)
+
+    with app.app_context():
+        tokens = {uid: encode_access_token({"sub": uid, "role": "student"}) for uid in student_ids}
+
+    def start(user_id):
+        client = app.test_client()
+        return client.post(f"/api/exams/{exam_id}/start", headers={"Authorization": f"Bearer {tokens[user_id]}"})
+
+    jobs = [uid for uid in student_ids for _ in range(args.clicks)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        responses = list(pool.map(start, jobs))
+    elapsed = time.perf_counter() - started
+
+    status = Counter(r.status_code for r in responses)
+    with app.app_context():
+        open_attempts = Counter(
+            uid for (uid,) in db.session.query(ExamAttempt.user_id).filter(ExamAttempt.end_time.is_(None))
+        )
+
+    print(f"requests: {len(jobs)} in {elapsed:.2f}s ({len(jobs) / elapsed:.0f} req/s), status: {dict(status)}")
+
+    duplicated = [uid for uid, n in open_attempts.items() if n > 1]
+    missing = [uid for uid in student_ids if uid not in open_attempts]
+    if duplicated or missing or status.get(201, 0) != args.students:
+        print(f"FAIL: duplicated={duplicated[:10]} missing={missing[:10]}")
+        sys.exit(1)
+    print("OK: mỗi học sinh có đúng 1 attempt đang mở")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Unique answer per attempt question
+
+Revision ID: 01ba7b71eef4
+Revises: 2830527fd184
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '01ba7b71eef4'
+down_revision = '2830527fd184'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dữ liệu cũ có thể bị trùng (nộp bài 2 lần) -> giữ lại câu trả lời mới nhất
+    op.execute(
+        "DELETE FROM answers WHERE id NOT IN ("
+        "SELECT MAX(id) FROM answers GROUP BY attempt_id, question_id)"
+    )
+    # PostgreSQL: CREATE INDEX CONCURRENTLY để không khóa ghi bảng answers (xem 7c0a02c0fc0a).
+    # autocommit_block commit phần DELETE ở trên trước khi tạo index.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_answers_attempt_question',
+            'answers',
+            ['attempt_id', 'question_id'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_answers_attempt_question', table_name='answers', postgresql_concurrently=True, if_exists=True
+        )
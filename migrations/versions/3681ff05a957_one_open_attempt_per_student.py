@@ -0,0 +1,67 @@
+"""One open attempt per student
+
+Revision ID: 3681ff05a957
+Revises: 01ba7b71eef4
+Create Date: 2026-10-18 10:03:47.918254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3681ff05a957'
+down_revision = '01ba7b71eef4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Attempt mở bị trùng (double-click "Bắt đầu") thường chưa có câu trả lời nào: xóa các attempt
+    # rỗng đó, giữ lại attempt có câu trả lời, nếu không có thì giữ attempt mới nhất.
+    # Không đóng attempt trùng (end_time + total_score NULL) vì sẽ thành bài "đã nộp" không có điểm.
+    op.execute(
+        "DELETE FROM exam_attempts "
+        "WHERE end_time IS NULL "
+        "AND NOT EXISTS (SELECT 1 FROM answers WHERE answers.attempt_id = exam_attempts.id) "
+        "AND EXISTS ("
+        "SELECT 1 FROM exam_attempts AS other "
+        "WHERE other.exam_id = exam_attempts.exam_id AND other.user_id = exam_attempts.user_id "
+        "AND other.end_time IS NULL AND other.id <> exam_attempts.id "
+        "AND (other.id > exam_attempts.id "
+        "OR EXISTS (SELECT 1 FROM answers WHERE answers.attempt_id = other.id)))"
+    )
+
+    # Còn trùng nghĩa là học sinh đã làm bài trên nhiều attempt cùng lúc -> phải xử lý tay
+    duplicated = op.get_bind().execute(
+        sa.text(
+            "SELECT exam_id, user_id FROM exam_attempts WHERE end_time IS NULL "
+            "GROUP BY exam_id, user_id HAVING COUNT(*) > 1"
+        )
+    ).fetchall()
+    if duplicated:
+        raise RuntimeError(
+            "Có học sinh đang mở nhiều attempt cùng có câu trả lời, cần gộp / nộp tay trước khi migrate "
+            f"(exam_id, user_id): {[tuple(row) for row in duplicated[:20]]}"
+        )
+
+    # PostgreSQL: CREATE INDEX CONCURRENTLY để không khóa ghi bảng đang chạy thật (xem 7c0a02c0fc0a).
+    # autocommit_block commit phần DELETE ở trên trước khi tạo index.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_exam_attempts_open',
+            'exam_attempts',
+            ['exam_id', 'user_id'],
+            unique=True,
+            postgresql_where=sa.text('end_time IS NULL'),
+            sqlite_where=sa.text('end_time IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_exam_attempts_open', table_name='exam_attempts', postgresql_concurrently=True, if_exists=True
+        )
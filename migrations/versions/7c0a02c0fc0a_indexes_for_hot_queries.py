@@ -0,0 +1,43 @@
+"""Indexes for hot queries
+
+Revision ID: 7c0a02c0fc0a
+Revises: 3681ff05a957
+Create Date: 2026-10-18 14:21:05.613384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c0a02c0fc0a'
+down_revision = '3681ff05a957'
+branch_labels = None
+depends_on = None
+
+
+# (tên index, bảng, cột) - khớp với index khai báo trong models
+INDEXES = [
+    ('ix_exam_attempts_exam_id_user_id_end_time', 'exam_attempts', ['exam_id', 'user_id', 'end_time']),
+    ('ix_exam_attempts_user_id_start_time', 'exam_attempts', ['user_id', 'start_time']),
+    ('ix_answers_question_id', 'answers', ['question_id']),
+    ('ix_questions_exam_id', 'questions', ['exam_id']),
+    ('ix_options_question_id', 'options', ['question_id']),
+    ('ix_exams_created_by_created_at', 'exams', ['created_by', 'created_at']),
+    ('ix_exams_created_at', 'exams', ['created_at']),
+]
+
+
+def upgrade():
+    # PostgreSQL: CREATE INDEX CONCURRENTLY để không khóa ghi bảng đang chạy thật.
+    # CONCURRENTLY không chạy được trong transaction -> autocommit_block.
+    # Nếu bị ngắt giữa chừng, index INVALID còn lại phải DROP thủ công trước khi chạy lại.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,79 @@
+"""Exam stats tables
+
+Revision ID: a256cebb08a1
+Revises: 7c0a02c0fc0a
+Create Date: 2026-10-18 15:02:44.180527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a256cebb08a1'
+down_revision = '7c0a02c0fc0a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('exam_stats',
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('score_sq_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id')
+    )
+    op.create_table('exam_score_buckets',
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id', 'bucket')
+    )
+    op.create_table('question_stats',
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('correct_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('question_id')
+    )
+    with op.batch_alter_table('question_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_question_stats_exam_id'), ['exam_id'], unique=False)
+
+    # Backfill từ các bài đã nộp (giống `flask rebuild-exam-stats`).
+    # Bucket = phần nguyên: PostgreSQL CAST làm tròn nên phải FLOOR trước; SQLite CAST cắt phần lẻ.
+    if op.get_bind().dialect.name == 'postgresql':
+        bucket = "CAST(FLOOR(COALESCE(total_score, 0)) AS INTEGER)"
+    else:
+        bucket = "CAST(COALESCE(total_score, 0) AS INTEGER)"
+    op.execute(
+        "INSERT INTO exam_stats (exam_id, attempt_count, score_sum, score_sq_sum) "
+        "SELECT exam_id, COUNT(*), SUM(COALESCE(total_score, 0)), "
+        "SUM(COALESCE(total_score, 0) * COALESCE(total_score, 0)) "
+        "FROM exam_attempts WHERE end_time IS NOT NULL GROUP BY exam_id"
+    )
+    op.execute(
+        f"INSERT INTO exam_score_buckets (exam_id, bucket, count) "
+        f"SELECT exam_id, {bucket}, COUNT(*) "
+        f"FROM exam_attempts WHERE end_time IS NOT NULL GROUP BY exam_id, {bucket}"
+    )
+    op.execute(
+        "INSERT INTO question_stats (question_id, exam_id, correct_count, score_sum) "
+        "SELECT a.question_id, t.exam_id, SUM(CASE WHEN a.score > 0 THEN 1 ELSE 0 END), "
+        "COALESCE(SUM(a.score), 0) "
+        "FROM answers a JOIN exam_attempts t ON t.id = a.attempt_id "
+        "WHERE t.end_time IS NOT NULL GROUP BY a.question_id, t.exam_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('question_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_stats_exam_id'))
+
+    op.drop_table('question_stats')
+    op.drop_table('exam_score_buckets')
+    op.drop_table('exam_stats')
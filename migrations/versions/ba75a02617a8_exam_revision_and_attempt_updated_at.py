@@ -0,0 +1,35 @@
+"""Exam revision and attempt updated_at
+
+Revision ID: ba75a02617a8
+Revises: a256cebb08a1
+Create Date: 2026-10-18 19:30:56.419336
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ba75a02617a8'
+down_revision = 'a256cebb08a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='1', nullable=False))
+
+    # Bài làm cũ: lấy mốc thay đổi gần nhất đã biết
+    op.execute("UPDATE exam_attempts SET updated_at = COALESCE(end_time, start_time)")
+
+
+def downgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.drop_column('revision')
+
+    with op.batch_alter_table('exam_attempts', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,85 @@
+import os
+
+# Config đọc DATABASE_URL lúc import; mỗi test vẫn dùng 1 file SQLite tạm riêng (fixture `app`)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.extensions.db import db  # noqa: E402
+
+
+@pytest.fixture
+def config_overrides(tmp_path):
+    """Giá trị gán đè lên Config trước khi tạo app; module test có thể override fixture này."""
+    return {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_BINDS": {},
+        "RATE_LIMIT_ENABLED": False,
+        "JWT_SECRET_KEY": "test-secret-key-for-hs256-signing-32b",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",  # Băm nhanh cho test
+    }
+
+
+@pytest.fixture
+def app(config_overrides, monkeypatch):
+    for name, value in config_overrides.items():
+        monkeypatch.setattr(Config, name, value)
+
+    app = create_app()
+    app.config["TESTING"] = True
+
+    # Cache answer key là global theo exam_id, DB mỗi test lại bắt đầu từ id 1
+    from app.controllers.exam_controller import grading_service
+
+    grading_service.clear()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """register(username, role) -> header Authorization của user vừa đăng ký."""
+
+    def _register(username: str, role: str = "student") -> dict:
+        response = client.post("/api/auth/register", json={"username": username, "password": "secret", "role": role})
+        assert response.status_code == 201, response.json
+        return {"Authorization": f"Bearer {response.json['token']}"}
+
+    return _register
+
+
+class StatementCounter:
+    """Đếm số câu SQL gửi xuống DB trong khối `with`."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *_args, **_kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def count_statements(app):
+    """`with count_statements() as counter:` -> counter.count = số câu SQL đã chạy."""
+    with app.app_context():
+        engine = db.engine
+    return lambda: StatementCounter(engine)
@@ -0,0 +1,10 @@
+from app.models.exam_model import Exam
+
+
+def test_check_indexes_passes_and_leaves_no_sample_rows(app):
+    result = app.test_cli_runner().invoke(args=["check-indexes"])
+    assert result.exit_code == 0, result.output
+    assert "list_exams:cursor" in result.output
+    assert "FAIL" not in result.output
+    with app.app_context():
+        assert Exam.query.count() == 0
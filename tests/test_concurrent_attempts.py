@@ -0,0 +1,81 @@
+"""Bấm "Bắt đầu" / "Nộp bài" song song (double-click, retry) không được tạo attempt trùng hay chấm 2 lần."""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.extensions.db import db
+from app.models.attempt_model import ExamAttempt
+
+STUDENTS = 8
+CLICKS = 4
+
+
+def _parallel(app, requests):
+    """requests: [(method, url, headers, json)] -> response, mỗi thread 1 test client riêng."""
+
+    def send(item):
+        method, url, headers, body = item
+        return app.test_client().open(url, method=method, headers=headers, json=body)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(send, requests))
+
+
+@pytest.fixture
+def exam_id(client, register):
+    teacher = register("teacher", role="teacher")
+    data = {
+        "title": "Kiểm tra 15 phút",
+        "duration": 15,
+        "questions": [
+            {
+                "content": f"Câu {q}",
+                "question_type": "mcq",
+                "options": [{"content": f"Đáp án {o}", "is_correct": o == 0} for o in range(4)],
+            }
+            for q in range(3)
+        ],
+    }
+    return client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+
+
+def test_parallel_starts_open_one_attempt_per_student(app, register, exam_id):
+    students = [register(f"student{i}") for i in range(STUDENTS)]
+    responses = _parallel(
+        app, [("POST", f"/api/exams/{exam_id}/start", headers, None) for headers in students for _ in range(CLICKS)]
+    )
+
+    assert all(r.status_code in (200, 201) for r in responses), [r.json for r in responses]
+    assert Counter(r.status_code for r in responses)[201] == STUDENTS
+    # Mọi click của cùng học sinh trả về cùng 1 attempt
+    attempt_ids = [r.json["attempt_id"] for r in responses]
+    for i in range(STUDENTS):
+        assert len(set(attempt_ids[i * CLICKS:(i + 1) * CLICKS])) == 1
+
+    with app.app_context():
+        open_attempts = Counter(
+            user_id for (user_id,) in db.session.query(ExamAttempt.user_id).filter(ExamAttempt.end_time.is_(None))
+        )
+    assert len(open_attempts) == STUDENTS
+    assert set(open_attempts.values()) == {1}
+
+
+def test_parallel_submits_grade_once(app, client, register, exam_id):
+    student = register("student")
+    attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+    questions = client.get(f"/api/exams/{exam_id}", headers=student).json["questions"]
+    # Đáp án đúng là đáp án đầu tiên: 3 câu x 1 điểm
+    body = {
+        "attempt_id": attempt_id,
+        "answers": [{"question_id": q["id"], "selected_option_id": q["options"][0]["id"]} for q in questions],
+    }
+
+    responses = _parallel(app, [("POST", f"/api/exams/{exam_id}/submit", student, body)] * CLICKS)
+
+    assert all(r.status_code == 200 for r in responses), [r.json for r in responses]
+    assert Counter(r.json["message"] for r in responses)["Nộp bài thành công"] == 1
+    with app.app_context():
+        attempt = db.session.get(ExamAttempt, attempt_id)
+        assert attempt.end_time is not None
+        assert attempt.total_score == 3
@@ -0,0 +1,77 @@
+"""ETag / 304: request lặp lại không tải lại body, còn dữ liệu đổi thì ETag phải đổi (không trả dữ liệu cũ)."""
+import pytest
+
+
+@pytest.fixture
+def exam(client, register):
+    teacher = register("teacher", role="teacher")
+    data = {
+        "title": "Đề ETag",
+        "duration": 15,
+        "questions": [
+            {
+                "content": f"Câu {q}: nội dung đủ dài để response vượt ngưỡng nén của Compressor",
+                "question_type": "mcq",
+                "options": [{"content": "A", "is_correct": True}, {"content": "B", "is_correct": False}],
+            }
+            for q in range(20)
+        ],
+    }
+    exam_id = client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+    return exam_id, teacher
+
+
+def _revalidate(client, url, etag, headers=None):
+    return client.get(url, headers={**(headers or {}), "If-None-Match": f'"{etag}"'})
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+def test_matching_etag_returns_empty_304(client, register, exam, accept_encoding):
+    exam_id, _ = exam
+    student = {**register("student"), "Accept-Encoding": accept_encoding}
+    first = client.get(f"/api/exams/{exam_id}", headers=student)
+    etag = first.get_etag()[0]
+    assert first.status_code == 200 and etag
+    assert etag.endswith("-gzip") == (accept_encoding == "gzip")
+
+    response = _revalidate(client, f"/api/exams/{exam_id}", etag, student)
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.get_etag()[0] == etag
+
+
+def test_submit_changes_exam_attempts_etag(client, register, exam):
+    exam_id, teacher = exam
+    student = register("student")
+    attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+    urls = {f"/api/exams/{exam_id}/attempts": teacher, "/api/exams/my-attempts": student}
+    etags = {url: client.get(url, headers=headers).get_etag()[0] for url, headers in urls.items()}
+    for url, headers in urls.items():
+        assert _revalidate(client, url, etags[url], headers).status_code == 304
+
+    client.post(f"/api/exams/{exam_id}/submit", headers=student, json={"attempt_id": attempt_id, "answers": []})
+
+    for url, headers in urls.items():
+        response = _revalidate(client, url, etags[url], headers)
+        assert response.status_code == 200, url
+        assert response.get_etag()[0] != etags[url]
+        assert response.json["items"][0]["end_time"] is not None
+
+
+def test_editing_question_changes_exam_etag(client, register, exam):
+    exam_id, teacher = exam
+    student = register("student")
+    etag = client.get(f"/api/exams/{exam_id}", headers=student).get_etag()[0]
+    question = client.get(f"/api/exams/{exam_id}/detail", headers=teacher).json["questions"][0]
+
+    response = client.post(
+        f"/api/exams/{exam_id}/update-answer",
+        headers=teacher,
+        json={"question_id": question["id"], "correct_option_id": question["options"][1]["id"]},
+    )
+    assert response.status_code == 200, response.json
+
+    response = _revalidate(client, f"/api/exams/{exam_id}", etag, student)
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
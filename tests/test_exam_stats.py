@@ -0,0 +1,75 @@
+"""Thống kê cộng dồn (nộp bài, chấm lại, chấm tự luận) phải khớp với lần tính lại từ dữ liệu gốc."""
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 9)
+    if isinstance(value, dict):
+        return {key: _rounded(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    return value
+
+
+def test_incremental_stats_match_rebuild(app, client, register):
+    teacher = register("teacher", role="teacher")
+    mcq = {
+        "question_type": "mcq",
+        "options": [{"content": "A", "is_correct": True}, {"content": "B", "is_correct": False}],
+    }
+    data = {
+        "title": "Đề thống kê",
+        "duration": 15,
+        "questions": [
+            dict(mcq, content="Câu 1"),
+            dict(mcq, content="Câu 2"),
+            {"content": "Câu 3", "question_type": "essay", "options": []},
+        ],
+    }
+    exam_id = client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+    q1, q2, essay = client.get(f"/api/exams/{exam_id}/detail", headers=teacher).json["questions"]
+
+    def answers(choice_1, choice_2):
+        return [
+            {"question_id": q1["id"], "selected_option_id": q1["options"][choice_1]["id"]},
+            {"question_id": q2["id"], "selected_option_id": q2["options"][choice_2]["id"]},
+            {"question_id": essay["id"], "essay_answer": "Bài làm tự luận"},
+        ]
+
+    attempts = []
+    for i, (choice_1, choice_2) in enumerate([(0, 0), (1, 0), (1, 1), (0, 1)]):
+        student = register(f"student{i}")
+        attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+        body = {"attempt_id": attempt_id, "answers": answers(choice_1, choice_2)}
+        assert client.post(f"/api/exams/{exam_id}/submit", headers=student, json=body).status_code == 200
+        attempts.append(attempt_id)
+
+    # Bài đang làm (chỉ autosave) không được tính vào thống kê, kể cả khi bị chấm lại
+    in_progress = register("in_progress")
+    open_id = client.post(f"/api/exams/{exam_id}/start", headers=in_progress).json["attempt_id"]
+    client.put(f"/api/exams/attempts/{open_id}/answers", headers=in_progress, json={"answers": answers(1, 1)})
+
+    # Chấm lại câu 1: B là đáp án đúng
+    response = client.post(
+        f"/api/exams/{exam_id}/update-answer",
+        headers=teacher,
+        json={"question_id": q1["id"], "correct_option_id": q1["options"][1]["id"]},
+    )
+    assert response.status_code == 200, response.json
+
+    # Chấm tự luận, 1 bài chấm 2 lần (delta so với điểm cũ)
+    for attempt_id, score in [(attempts[0], 0.5), (attempts[1], 1.0), (attempts[0], 0.75), (attempts[3], 0.0)]:
+        response = client.post(
+            f"/api/exams/attempts/{attempt_id}/grade",
+            headers=teacher,
+            json={"question_id": essay["id"], "score": score},
+        )
+        assert response.status_code == 200, response.json
+
+    incremental = client.get(f"/api/exams/{exam_id}/stats", headers=teacher).json
+    result = app.test_cli_runner().invoke(args=["rebuild-exam-stats", "--exam-id", str(exam_id)])
+    assert result.exit_code == 0, result.output
+    rebuilt = client.get(f"/api/exams/{exam_id}/stats", headers=teacher).json
+
+    assert rebuilt["attempt_count"] == 4
+    assert _rounded(incremental) == _rounded(rebuilt)
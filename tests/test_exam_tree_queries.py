@@ -0,0 +1,71 @@
+"""Số câu SQL của các endpoint trả về cả cây đề thi không được tăng theo số câu hỏi (không N+1)."""
+import pytest
+
+
+def _exam_data(questions: int) -> dict:
+    return {
+        "title": f"Đề {questions} câu",
+        "duration": 45,
+        "questions": [
+            {
+                "content": f"Câu {q}",
+                "question_type": "mcq" if q % 5 else "essay",
+                "options": [{"content": f"Đáp án {o}", "is_correct": o == 0} for o in range(4)] if q % 5 else [],
+            }
+            for q in range(questions)
+        ],
+    }
+
+
+@pytest.fixture
+def exams(client, register):
+    teacher = register("teacher", role="teacher")
+    student = register("student")
+    result = {}
+    for size in (5, 50):
+        exam_id = client.post("/api/exams/create", headers=teacher, json=_exam_data(size)).json["exam_id"]
+        attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+        answers = [{"question_id": q["id"], "selected_option_id": (q["options"] or [{}])[0].get("id")}
+                   for q in client.get(f"/api/exams/{exam_id}").json["questions"]]
+        client.post(
+            f"/api/exams/{exam_id}/submit", headers=student, json={"attempt_id": attempt_id, "answers": answers}
+        )
+        result[size] = (exam_id, attempt_id)
+    return teacher, student, result
+
+
+def _statements(client, count_statements, url, headers):
+    with count_statements() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.json
+    return counter.count, response.json
+
+
+def test_get_exam_query_count_is_constant(app, client, count_statements, exams):
+    _, student, result = exams
+    counts = {}
+    for size, (exam_id, _) in result.items():
+        app.extensions["payload_cache"].clear()  # Đo đúng lần build từ DB, không phải cache hit
+        counts[size], body = _statements(client, count_statements, f"/api/exams/{exam_id}", student)
+        assert len(body["questions"]) == size
+        assert all("is_correct" not in o for q in body["questions"] for o in q["options"])
+    assert counts[5] == counts[50]
+
+
+def test_exam_detail_query_count_is_constant(client, count_statements, exams):
+    teacher, _, result = exams
+    counts = {}
+    for size, (exam_id, _) in result.items():
+        counts[size], body = _statements(client, count_statements, f"/api/exams/{exam_id}/detail", teacher)
+        assert len(body["questions"]) == size
+    assert counts[5] == counts[50]
+
+
+def test_attempt_detail_query_count_is_constant(client, count_statements, exams):
+    _, student, result = exams
+    counts = {}
+    for size, (_, attempt_id) in result.items():
+        counts[size], body = _statements(client, count_statements, f"/api/exams/attempts/{attempt_id}", student)
+        assert len(body["questions"]) == size
+        assert len(body["answers"]) == size
+    assert counts[5] == counts[50]
@@ -0,0 +1,44 @@
+"""Phân trang keyset duyệt đủ mọi dòng đúng 1 lần, kể cả dòng cũ có cột sắp xếp NULL."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.extensions.db import db
+from app.models.exam_model import Exam
+from app.repositories.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_with_null_sort_value():
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    assert decode_cursor(encode_cursor(datetime(2024, 5, 1, 8, 30), 7)) == (datetime(2024, 5, 1, 8, 30), 7)
+
+
+def test_pages_cover_rows_with_null_created_at(app, client, register):
+    teacher = register("teacher", role="teacher")
+    question = {"content": "Câu 1", "question_type": "essay", "options": []}
+    exams = [{"title": f"Đề {i}", "duration": 10, "questions": [question]} for i in range(7)]
+    exam_ids = client.post("/api/exams/batch-create", headers=teacher, json={"exams": exams}).json["exam_ids"]
+
+    # 3 đề "cũ" không có created_at, 4 đề còn lại có 2 đề trùng created_at
+    base = datetime(2024, 5, 1)
+    created_at = [None, None, None, base, base, base + timedelta(days=1), base + timedelta(days=2)]
+    with app.app_context():
+        for exam_id, value in zip(exam_ids, created_at):
+            db.session.execute(update(Exam).where(Exam.id == exam_id).values(created_at=value))
+        db.session.commit()
+
+    for url in ("/api/exams", "/api/exams/my-created"):
+        seen, cursor = [], None
+        while True:
+            response = client.get(url, headers=teacher, query_string={"limit": 2, "cursor": cursor or ""})
+            assert response.status_code == 200, response.json
+            seen += [exam["id"] for exam in response.json["items"]]
+            cursor = response.json["next_cursor"]
+            if not cursor:
+                break
+
+        # NULL xếp đầu (id giảm dần), rồi created_at giảm dần, trùng created_at thì id giảm dần
+        nulls, dated = exam_ids[:3], exam_ids[3:]
+        assert seen == nulls[::-1] + [dated[3], dated[2], dated[1], dated[0]], url
+        everything = client.get(url, headers=teacher, query_string={"all": "true"}).json
+        assert [exam["id"] for exam in everything] == seen
@@ -0,0 +1,38 @@
+"""Suất trong hàng đợi PDF (max_pending) phải được trả lại dù submit lỗi hay lấy từ cache."""
+import pytest
+
+from app.services import pdf_job_service
+from app.services.pdf_job_service import PdfImportJobManager, PdfJobQueueFull
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = PdfImportJobManager()
+    manager.job_dir = str(tmp_path / "jobs")
+    manager.max_pending = 1
+    return manager
+
+
+def test_failed_submit_releases_slot(manager, monkeypatch):
+    def broken_write(job):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(manager, "_write", broken_write)
+    for _ in range(3):
+        with pytest.raises(OSError):
+            manager.submit(b"%PDF", "exam.pdf")
+    assert manager._pending == 0
+
+
+def test_cached_submit_releases_slot(manager, monkeypatch):
+    monkeypatch.setattr(pdf_job_service.pdf_parse_cache, "get", lambda key: [{"content": "Câu 1"}])
+    for _ in range(3):
+        job = manager.submit(b"%PDF", "exam.pdf")
+        assert job["status"] == "done" and job["count"] == 1
+    assert manager._pending == 0
+
+
+def test_queue_full(manager):
+    manager._pending = manager.max_pending
+    with pytest.raises(PdfJobQueueFull):
+        manager.submit(b"%PDF", "exam.pdf")
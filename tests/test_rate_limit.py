@@ -0,0 +1,69 @@
+"""Token bucket của RateLimiter (backend memory://) trên endpoint đăng nhập."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import rate_limit
+
+
+@pytest.fixture
+def config_overrides(config_overrides):
+    return dict(
+        config_overrides,
+        RATE_LIMIT_ENABLED=True,
+        RATE_LIMIT_BACKEND_URL="memory://",
+        RATE_LIMITS={"login_ip": "4/minute", "login_username": "2/minute", "register_ip": "100/minute"},
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Đồng hồ giả của rate limiter: clock.now += giây để cho bucket hồi token."""
+    fake = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+def _login(client, username, ip="10.0.0.1"):
+    return client.post(
+        "/api/auth/login",
+        json={"username": username, "password": "wrong"},
+        environ_base={"REMOTE_ADDR": ip},
+    )
+
+
+def test_username_bucket_empties_and_refills(client, clock):
+    for _ in range(2):
+        assert _login(client, "alice").status_code != 429
+
+    limited = _login(client, "alice")
+    assert limited.status_code == 429
+    # 2/minute: hồi 1 token mỗi 30 giây
+    assert limited.headers["Retry-After"] == "30"
+
+    # Bucket theo username: user khác cùng IP vẫn đăng nhập được
+    assert _login(client, "bob").status_code != 429
+
+    clock.now += 29
+    assert _login(client, "alice").status_code == 429
+    clock.now += 31
+    assert _login(client, "alice").status_code != 429
+
+
+def test_ip_bucket_is_per_client_ip(client, clock):
+    # Mỗi username chỉ 1 lần -> chỉ bucket theo IP (4/minute) bị trừ
+    statuses = [_login(client, f"user{i}").status_code for i in range(5)]
+    assert [status == 429 for status in statuses] == [False] * 4 + [True]
+
+    assert _login(client, "user9", ip="10.0.0.2").status_code != 429
+    # Không tin X-Forwarded-For khi RATE_LIMIT_TRUST_PROXY tắt
+    spoofed = client.post(
+        "/api/auth/login",
+        json={"username": "user10", "password": "wrong"},
+        headers={"X-Forwarded-For": "10.0.0.3"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"},
+    )
+    assert spoofed.status_code == 429
+
+    clock.now += 15
+    assert _login(client, "user11").status_code != 429
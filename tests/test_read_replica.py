@@ -0,0 +1,78 @@
+"""Định tuyến đọc replica / ghi primary của RoutingSession, với primary và replica là 2 file SQLite."""
+import pytest
+from flask import jsonify
+
+from app.extensions.db import FORCE_PRIMARY_HEADER, REPLICA_BIND_KEY, db, read_only
+from app.models.exam_model import Exam
+
+
+@pytest.fixture
+def config_overrides(config_overrides, tmp_path):
+    return dict(config_overrides, SQLALCHEMY_BINDS={REPLICA_BIND_KEY: {"url": f"sqlite:///{tmp_path / 'replica.db'}"}})
+
+
+@pytest.fixture
+def app(app):
+    """Thêm 1 view @read_only vừa đọc vừa ghi (route phải đăng ký trước request đầu tiên)."""
+
+    @app.route("/_test/write-then-read", methods=["POST"])
+    @read_only
+    def write_then_read():
+        before = [e.title for e in Exam.query.order_by(Exam.id)]
+        db.session.add(Exam(title="written", duration=10, created_by=1))
+        db.session.flush()
+        after = [e.title for e in Exam.query.order_by(Exam.id)]
+        db.session.commit()
+        return jsonify({"before": before, "after": after})
+
+    yield app
+    # db là global: init_app tạo metadata cho mọi bind, app của test sau không có bind replica
+    db.metadatas.pop(REPLICA_BIND_KEY, None)
+
+
+@pytest.fixture
+def teacher(app, register):
+    """Giáo viên (id trên primary) có 1 đề khác tên ở mỗi DB để biết câu đọc chạy trên DB nào."""
+    headers = register("teacher", role="teacher")
+    with app.app_context():
+        replica = db.engines[REPLICA_BIND_KEY]
+        db.metadata.create_all(replica)
+        db.session.add(Exam(title="primary", duration=10, created_by=1))
+        db.session.commit()
+        with replica.begin() as connection:
+            connection.execute(Exam.__table__.insert().values(title="replica", duration=10, created_by=1))
+    return headers
+
+
+def _titles(response):
+    assert response.status_code == 200, response.json
+    return [exam["title"] for exam in response.json["items"]]
+
+
+def _primary_and_replica_titles(app):
+    with app.app_context():
+        primary = [title for (title,) in db.session.execute(db.select(Exam.title).order_by(Exam.id))]
+        with db.engines[REPLICA_BIND_KEY].connect() as connection:
+            replica = [title for (title,) in connection.execute(db.select(Exam.title).order_by(Exam.id))]
+    return primary, replica
+
+
+def test_read_only_view_reads_replica(client, teacher):
+    assert _titles(client.get("/api/exams/my-created", headers=teacher)) == ["replica"]
+
+
+def test_force_primary_header(client, teacher):
+    response = client.get("/api/exams/my-created", headers={**teacher, FORCE_PRIMARY_HEADER: "1"})
+    assert _titles(response) == ["primary"]
+
+
+def test_use_primary_in_read_only_view(client, teacher):
+    # list_exams gọi use_primary() trước khi build trang đầu (trang này được cache)
+    assert _titles(client.get("/api/exams")) == ["primary"]
+
+
+def test_write_and_read_after_write_stay_on_primary(app, client, teacher):
+    response = client.post("/_test/write-then-read")
+
+    assert response.json == {"before": ["replica"], "after": ["primary", "written"]}
+    assert _primary_and_replica_titles(app) == (["primary", "written"], ["replica"])
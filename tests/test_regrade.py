@@ -0,0 +1,42 @@
+"""Sửa đáp án đúng chấm lại tổng điểm các bài đã nộp, không đụng bài đang làm."""
+from app.extensions.db import db
+from app.models.attempt_model import ExamAttempt
+
+
+def test_regrade_only_updates_submitted_totals(app, client, register):
+    teacher = register("teacher", role="teacher")
+    data = {
+        "title": "Đề chấm lại",
+        "duration": 15,
+        "questions": [
+            {
+                "content": "Câu 1",
+                "question_type": "mcq",
+                "options": [{"content": "A", "is_correct": True}, {"content": "B", "is_correct": False}],
+            }
+        ],
+    }
+    exam_id = client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+    question = client.get(f"/api/exams/{exam_id}/detail", headers=teacher).json["questions"][0]
+    option_a, option_b = (o["id"] for o in question["options"])
+    answer_b = [{"question_id": question["id"], "selected_option_id": option_b}]
+
+    submitted, in_progress = register("submitted"), register("in_progress")
+    submitted_id = client.post(f"/api/exams/{exam_id}/start", headers=submitted).json["attempt_id"]
+    client.post(
+        f"/api/exams/{exam_id}/submit", headers=submitted, json={"attempt_id": submitted_id, "answers": answer_b}
+    )
+    open_id = client.post(f"/api/exams/{exam_id}/start", headers=in_progress).json["attempt_id"]
+    client.put(f"/api/exams/attempts/{open_id}/answers", headers=in_progress, json={"answers": answer_b})
+
+    response = client.post(
+        f"/api/exams/{exam_id}/update-answer",
+        headers=teacher,
+        json={"question_id": question["id"], "correct_option_id": option_b},
+    )
+
+    assert response.status_code == 200, response.json
+    assert response.json["re_graded_count"] == 1
+    with app.app_context():
+        assert db.session.get(ExamAttempt, submitted_id).total_score == 1.0
+        assert db.session.get(ExamAttempt, open_id).total_score is None
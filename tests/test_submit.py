@@ -0,0 +1,114 @@
+"""Nộp bài: payload lúc nộp là trạng thái mới nhất của client (last-write-wins so với autosave)."""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.controllers.exam_controller import exam_repo, grading_service
+from app.extensions.db import db
+from app.models.attempt_model import ExamAttempt
+
+
+def test_submit_payload_overrides_autosave(client, register):
+    teacher = register("teacher", role="teacher")
+    data = {
+        "title": "Đề 2 câu",
+        "duration": 15,
+        "questions": [
+            {
+                "content": f"Câu {q}",
+                "question_type": "mcq",
+                "options": [{"content": "A", "is_correct": True}, {"content": "B", "is_correct": False}],
+            }
+            for q in range(2)
+        ],
+    }
+    exam_id = client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+    first, second = client.get(f"/api/exams/{exam_id}", headers=teacher).json["questions"]
+
+    student = register("student")
+    attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+    # Autosave: cả 2 câu chọn A (đúng)
+    client.put(
+        f"/api/exams/attempts/{attempt_id}/answers",
+        headers=student,
+        json={
+            "answers": [{"question_id": q["id"], "selected_option_id": q["options"][0]["id"]} for q in (first, second)]
+        },
+    )
+
+    # Lúc nộp chỉ gửi lại câu 1, đổi sang B (sai): câu 1 bị ghi đè, câu 2 giữ bản autosave
+    response = client.post(
+        f"/api/exams/{exam_id}/submit",
+        headers=student,
+        json={
+            "attempt_id": attempt_id,
+            "answers": [{"question_id": first["id"], "selected_option_id": first["options"][1]["id"]}],
+        },
+    )
+
+    assert response.status_code == 200, response.json
+    assert response.json["total_score"] == 1.0
+
+
+def _start_with_autosave(client, register):
+    teacher = register("teacher", role="teacher")
+    data = {
+        "title": "Đề 1 câu",
+        "duration": 15,
+        "questions": [
+            {
+                "content": "Câu 1",
+                "question_type": "mcq",
+                "options": [{"content": "A", "is_correct": True}, {"content": "B", "is_correct": False}],
+            }
+        ],
+    }
+    exam_id = client.post("/api/exams/create", headers=teacher, json=data).json["exam_id"]
+    question = client.get(f"/api/exams/{exam_id}", headers=teacher).json["questions"][0]
+    option_a, option_b = (o["id"] for o in question["options"])
+
+    student = register("student")
+    attempt_id = client.post(f"/api/exams/{exam_id}/start", headers=student).json["attempt_id"]
+    response = client.put(
+        f"/api/exams/attempts/{attempt_id}/answers",
+        headers=student,
+        json={"answers": [{"question_id": question["id"], "selected_option_id": option_a}]},
+    )
+    assert response.status_code == 200, response.json
+    change = {"answers": [{"question_id": question["id"], "selected_option_id": option_b}]}
+    return exam_id, attempt_id, student, option_a, change
+
+
+def _stored_choices(app, attempt_id):
+    with app.app_context():
+        return [row.selected_option_id for row in exam_repo.get_attempt_answer_choices(attempt_id)]
+
+
+def test_autosave_after_submit_is_rejected(app, client, register):
+    exam_id, attempt_id, student, option_a, change = _start_with_autosave(client, register)
+    submitted = client.post(f"/api/exams/{exam_id}/submit", headers=student, json={"attempt_id": attempt_id})
+    assert submitted.json["total_score"] == 1.0
+
+    response = client.put(f"/api/exams/attempts/{attempt_id}/answers", headers=student, json=change)
+
+    assert response.status_code == 409
+    assert _stored_choices(app, attempt_id) == [option_a]
+
+
+def test_autosave_racing_submit_is_rejected(app, client, register, monkeypatch):
+    """Bài bị nộp (ở connection khác) sau khi autosave đã đọc attempt còn mở."""
+    exam_id, attempt_id, student, option_a, change = _start_with_autosave(client, register)
+    normalize_answers = grading_service.normalize_answers
+
+    def submit_concurrently(*args, **kwargs):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ExamAttempt).where(ExamAttempt.id == attempt_id).values(end_time=datetime.utcnow())
+            )
+        return normalize_answers(*args, **kwargs)
+
+    monkeypatch.setattr(grading_service, "normalize_answers", submit_concurrently)
+    response = client.put(f"/api/exams/attempts/{attempt_id}/answers", headers=student, json=change)
+
+    assert response.status_code == 409
+    assert _stored_choices(app, attempt_id) == [option_a]